@@ -0,0 +1,76 @@
+"""批量大模型调用：查房时一次为多个病人生成建议。
+
+一批输入先去重，相同的输入只调用一次模型；不同的输入在进程级有界线程池中
+并发执行，每批同时进行的调用不超过 ``concurrency``（滑动窗口：完成一个再
+提交下一个），进程内全部批次同时进行的调用不超过线程池大小。结果按完成顺序
+产出，调用方可以边完成边返回给前端。
+
+客户端中途断开时生成器被关闭，尚未开始的调用不会再提交。
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+
+def group_duplicates(keys: Sequence[Hashable]) -> Tuple[List[int], Dict[int, List[int]]]:
+    """返回 (每组第一项的位置, 第一项位置 -> 该组全部位置)。"""
+    first_of: Dict[Hashable, int] = {}
+    groups: Dict[int, List[int]] = {}
+    for position, key in enumerate(keys):
+        first = first_of.setdefault(key, position)
+        groups.setdefault(first, []).append(position)
+    return list(groups), groups
+
+
+class BatchRunner:
+    """进程级有界线程池，按批次限制并发。"""
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # 延迟创建，避免在 fork 之前启动线程
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ai-batch')
+            return self._executor
+
+    def run(self, func: Callable[..., Any], calls: Sequence[Dict[str, Any]],
+            concurrency: int) -> Iterator[Tuple[int, Any, Optional[str]]]:
+        """并发执行 ``func(**calls[i])``，按完成顺序产出 (i, 结果, 错误信息)。"""
+        executor = self._get_executor()
+        pending: Dict[Future, int] = {}
+        queued = iter(enumerate(calls))
+
+        def submit_next() -> None:
+            for position, kwargs in queued:
+                pending[executor.submit(func, **kwargs)] = position
+                return
+
+        for _ in range(max(1, concurrency)):
+            submit_next()
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position = pending.pop(future)
+                    # 先补满窗口再把结果交给调用方，发送结果期间调用不中断
+                    submit_next()
+                    try:
+                        yield position, future.result(), None
+                    except Exception as exc:
+                        yield position, None, str(exc)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
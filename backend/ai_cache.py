@@ -0,0 +1,191 @@
+"""AI 建议缓存：按规范化后的临床输入缓存大模型结果。
+
+缓存键由（症状、既往史、过敏史、年龄段、性别、模型、提示词版本）规范化后
+取 SHA-256 得到，空白、大小写与“无/未提供”等写法差异不会影响命中。
+
+后端可插拔：
+
+- ``memory``：进程内 LRU + TTL（默认）；
+- ``redis``：多进程/多机共享，需要安装 redis 库；
+- ``none``：关闭缓存。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+# 视为“未填写”的常见写法
+_EMPTY_VALUES = {'', '无', '没有', '否认', '未提供', '不详', 'none', 'null', 'n/a'}
+_WHITESPACE_RE = re.compile(r'\s+')
+_TRAILING_PUNCT_RE = re.compile(r'[。.，,；;！!、\s]+$')
+
+
+def normalize_text(value: Optional[str]) -> str:
+    if value is None:
+        return ''
+    text = _WHITESPACE_RE.sub(' ', str(value)).strip().lower()
+    text = _TRAILING_PUNCT_RE.sub('', text)
+    return '' if text in _EMPTY_VALUES else text
+
+
+def age_band(age: Any) -> str:
+    """年龄分段：儿童按用药常用分段，成人按十岁一段。"""
+    try:
+        age = int(age)
+    except (TypeError, ValueError):
+        return 'unknown'
+    if age < 0:
+        return 'unknown'
+    for upper, label in ((3, '0-2'), (7, '3-6'), (13, '7-12'), (18, '13-17')):
+        if age < upper:
+            return label
+    decade = age // 10 * 10
+    return f'{decade}-{decade + 9}'
+
+
+def make_cache_key(
+    symptom: str,
+    medical_history: Optional[str],
+    allergy_history: Optional[str],
+    age: Any,
+    gender: Optional[str],
+    model: str,
+    prompt_version: str,
+) -> str:
+    parts = [
+        normalize_text(symptom),
+        normalize_text(medical_history),
+        normalize_text(allergy_history),
+        age_band(age),
+        normalize_text(gender),
+        model,
+        prompt_version,
+    ]
+    raw = json.dumps(parts, ensure_ascii=False, separators=(',', ':'))
+    return 'ai:suggestion:' + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class InMemoryCacheBackend:
+    """进程内 LRU + TTL 缓存（线程安全）。"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """基于 Redis 的共享缓存，过期由 Redis 负责，淘汰策略请配置 allkeys-lru。"""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as exc:  # pragma: no cover - redis 非必装
+            raise RuntimeError('未安装 redis 库，请执行 `pip install redis`.') from exc
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[Dict]:
+        raw = self._client.get(key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, value: Dict, ttl: float) -> None:
+        self._client.set(key, json.dumps(value, ensure_ascii=False), ex=max(1, int(ttl)))
+
+
+class SuggestionCache:
+    """带命中统计的缓存门面；backend 为 None 时相当于关闭缓存。"""
+
+    def __init__(self, backend=None, ttl_seconds: float = 3600):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def get(self, key: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        try:
+            value = self.backend.get(key)
+        except Exception:  # 共享缓存不可用时不影响主流程
+            value = None
+        self._count('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, key: str, value: Dict) -> None:
+        if not self.enabled:
+            return
+        try:
+            self.backend.set(key, value, self.ttl_seconds)
+        except Exception:
+            pass
+
+    def get_or_compute(self, key: str, compute: Callable[[], Dict], bypass: bool = False,
+                       cacheable: Callable[[Dict], bool] = lambda value: True) -> Dict:
+        if bypass:
+            self._count('bypassed')
+        else:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+        value = compute()
+        if cacheable(value):
+            self.set(key, value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__ if self.backend is not None else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'bypassed': self.bypassed,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'size': len(self.backend) if isinstance(self.backend, InMemoryCacheBackend) else None,
+        }
+
+
+def build_suggestion_cache(backend: str, ttl_seconds: float, max_entries: int, redis_url: str) -> SuggestionCache:
+    backend = (backend or 'memory').lower()
+    if backend == 'none':
+        return SuggestionCache(None, ttl_seconds)
+    if backend == 'redis':
+        return SuggestionCache(RedisCacheBackend(redis_url), ttl_seconds)
+    return SuggestionCache(InMemoryCacheBackend(max_entries), ttl_seconds)
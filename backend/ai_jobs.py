@@ -0,0 +1,271 @@
+"""AI 异步任务：把耗时的大模型调用移出 Flask 请求线程。
+
+提交任务立即返回 job_id，由有界线程池执行大模型调用；客户端轮询（可带
+`wait` 长轮询）获取结果。并发数与排队上限均可配置，超过排队上限时直接拒绝，
+避免推理模型的慢请求占满所有 Web worker。
+
+任务在提交它的进程中执行；多 worker 部署时轮询请求通常落在其它进程上，因此
+任务状态同时写入共享存储（``DatabaseJobStore``，数据库表 ai_jobs）。本进程的
+任务直接读内存并用事件等待，其它进程的任务从共享存储读取，长轮询时按
+poll_interval 重新查询。未配置共享存储时任务状态只在进程内存中，仅适用于
+单进程部署。
+
+执行任务的进程被杀掉（gunicorn 超时、OOM、优雅退出时间用完）时，表中的任务
+会停在 pending / running。超过 timeout_seconds（从开始执行算起，尚未开始的从
+提交算起）仍未结束的任务在读取或清理时标记为失败，随后与其它已结束的任务
+一起过期删除。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any, Callable, ContextManager, Dict, Optional
+
+from sqlalchemy import func
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+STALE_JOB_ERROR = '任务执行超时（执行该任务的进程可能已退出），请重新提交'
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(RuntimeError):
+    """排队中的任务已达上限。"""
+
+
+class AiJob:
+    def __init__(self, owner: Optional[str], job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex
+        self.owner = owner
+        self.status = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._done = threading.Event()
+
+    @classmethod
+    def restore(cls, job_id: str, owner: Optional[str], status: str, result: Any = None,
+                error: Optional[str] = None) -> 'AiJob':
+        """由共享存储中的记录还原（其它进程的任务，只读）。"""
+        job = cls(owner, job_id)
+        job.status = status
+        job.result = result
+        job.error = error
+        if status in (SUCCEEDED, FAILED):
+            job._done.set()
+        return job
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+def _to_datetime(timestamp: Optional[float]) -> Optional[datetime]:
+    return datetime.utcfromtimestamp(timestamp) if timestamp is not None else None
+
+
+class DatabaseJobStore:
+    """任务状态存数据库表，多进程共享。get_engine 在应用上下文中调用。"""
+
+    def __init__(self, table, get_engine: Callable[[], Any], poll_interval: float = 0.2,
+                 timeout_seconds: float = 600):
+        self.table = table
+        self.get_engine = get_engine
+        self.poll_interval = poll_interval
+        self.timeout_seconds = timeout_seconds
+
+    def _values(self, job: AiJob) -> Dict[str, Any]:
+        return {
+            'status': job.status,
+            'result': json.dumps(job.result, ensure_ascii=False) if job.result is not None else None,
+            'error': job.error,
+            'started_at': _to_datetime(job.started_at),
+            'finished_at': _to_datetime(job.finished_at),
+        }
+
+    def _expire_stale(self, connection, now: float, job_id: Optional[str] = None) -> int:
+        """把超时未结束的任务标记为失败，返回标记的行数。"""
+        table = self.table
+        stmt = table.update().where(
+            table.c.status.in_((PENDING, RUNNING)),
+            func.coalesce(table.c.started_at, table.c.created_at) < _to_datetime(now - self.timeout_seconds),
+        )
+        if job_id is not None:
+            stmt = stmt.where(table.c.id == job_id)
+        return connection.execute(stmt.values(
+            status=FAILED, error=STALE_JOB_ERROR, finished_at=_to_datetime(now),
+        )).rowcount
+
+    def add(self, job: AiJob) -> None:
+        with self.get_engine().begin() as connection:
+            connection.execute(self.table.insert().values(
+                id=job.id, owner=job.owner, created_at=_to_datetime(job.created_at), **self._values(job)
+            ))
+
+    def update(self, job: AiJob) -> None:
+        with self.get_engine().begin() as connection:
+            connection.execute(self.table.update().where(self.table.c.id == job.id).values(**self._values(job)))
+
+    def load(self, job_id: str) -> Optional[AiJob]:
+        table = self.table
+        query = (table.select().with_only_columns(table.c.owner, table.c.status, table.c.result, table.c.error)
+                 .where(table.c.id == job_id))
+        with self.get_engine().connect() as connection:
+            row = connection.execute(query).first()
+        if row is not None and row.status in (PENDING, RUNNING):
+            with self.get_engine().begin() as connection:
+                if self._expire_stale(connection, time.time(), job_id):
+                    row = connection.execute(query).first()
+        if row is None:
+            return None
+        result = json.loads(row.result) if row.result is not None else None
+        return AiJob.restore(job_id, row.owner, row.status, result, row.error)
+
+    def purge(self, finished_before: float) -> None:
+        with self.get_engine().begin() as connection:
+            self._expire_stale(connection, time.time())
+            connection.execute(self.table.delete().where(self.table.c.finished_at < _to_datetime(finished_before)))
+
+
+class AiJobManager:
+    """有界线程池 + 进程内任务表，可选写入共享存储。
+
+    store 的读写需要的执行环境（如 Flask 应用上下文）由 background_context 提供，
+    它在提交任务的线程中调用，返回的上下文管理器在执行任务的线程中进入。
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 32, ttl_seconds: float = 600,
+                 store: Optional[DatabaseJobStore] = None,
+                 background_context: Optional[Callable[[], ContextManager]] = None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self.background_context = background_context
+        self._jobs: Dict[str, AiJob] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._store_purged_at = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # 延迟创建，避免在 fork 之前启动线程
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='ai-job')
+        return self._executor
+
+    def submit(self, func: Callable[..., Any], *args, owner: Optional[str] = None, **kwargs) -> AiJob:
+        job = AiJob(owner)
+        with self._lock:
+            self._purge_expired()
+            unfinished = sum(1 for existing in self._jobs.values() if not existing.done)
+            if unfinished >= self.max_workers + self.max_pending:
+                raise JobQueueFull('AI 任务排队已满，请稍后重试')
+            self._jobs[job.id] = job
+            executor = self._get_executor()
+        context = nullcontext()
+        if self.store is not None:
+            try:
+                self._purge_store()
+                self.store.add(job)
+            except Exception:
+                with self._lock:
+                    self._jobs.pop(job.id, None)
+                raise
+            if self.background_context is not None:
+                context = self.background_context()
+        executor.submit(self._run, job, func, args, kwargs, context)
+        return job
+
+    def get(self, job_id: str) -> Optional[AiJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self.store.load(job_id)
+        return job
+
+    def wait(self, job: AiJob, timeout: float) -> AiJob:
+        """等待任务完成（最多 timeout 秒），返回最新状态。"""
+        with self._lock:
+            local = self._jobs.get(job.id) is job
+        if local or self.store is None:
+            job.wait(timeout)
+            return job
+        # 其它进程的任务：轮询共享存储
+        deadline = time.monotonic() + timeout
+        while not job.done:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(self.store.poll_interval, remaining))
+            job = self.store.load(job.id) or job
+        return job
+
+    def _run(self, job: AiJob, func, args, kwargs, context: ContextManager) -> None:
+        with context:
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._save(job)
+            try:
+                job.result = func(*args, **kwargs)
+                job.status = SUCCEEDED
+            except Exception as exc:  # pragma: no cover - 由具体任务决定
+                job.error = str(exc)
+                job.status = FAILED
+            finally:
+                job.finished_at = time.time()
+                self._save(job)
+                job._done.set()
+
+    def _save(self, job: AiJob) -> None:
+        if self.store is None:
+            return
+        try:
+            self.store.update(job)
+        except Exception:
+            # 写入失败时本进程的轮询仍可读到结果，其它进程看到的状态滞后
+            logger.exception('AI 任务 %s 状态写入共享存储失败', job.id)
+
+    def _purge_expired(self) -> None:
+        deadline = time.time() - self.ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < deadline
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _purge_store(self) -> None:
+        # 共享存储中的过期任务每隔 ttl/10 清理一次，不必每次提交都删除
+        now = time.time()
+        if now - self._store_purged_at < self.ttl_seconds / 10:
+            return
+        self._store_purged_at = now
+        self.store.purge(now - self.ttl_seconds)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -3,18 +3,61 @@
 from __future__ import annotations
 
 import json
-from typing import Dict, List, Optional
+import os
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
 
 try:
-    from openai import OpenAI
+    from openai import APIConnectionError, APIStatusError, OpenAI
 except ImportError:  # pragma: no cover - openai 非必装
     OpenAI = None  # type: ignore
+    APIConnectionError = APIStatusError = ()  # type: ignore  # isinstance 恒为 False
 
 # 从配置文件导入
-from config import LLM_BASE_URL, LLM_API_KEY, LLM_MODEL
+from config import (
+    LLM_BASE_URL, LLM_API_KEY, LLM_MODEL,
+    LLM_POOL_SIZE, LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT, LLM_MAX_RETRIES,
+    LLM_BREAKER_FAILURES, LLM_BREAKER_SLOW_SECONDS, LLM_BREAKER_RESET_SECONDS,
+    AI_CACHE_BACKEND, AI_CACHE_TTL_SECONDS, AI_CACHE_MAX_ENTRIES, AI_CACHE_REDIS_URL,
+)
+from ai_cache import build_suggestion_cache, make_cache_key
+from llm_guard import CircuitBreaker, CircuitOpenError, SingleFlight
+from request_metrics import track
+from template_index import TemplateIndex, template_text
+
+# 提示词版本：修改病历建议提示词时递增，使旧缓存自然失效
+PROMPT_VERSION = "record-suggestion-v1"
+
+suggestion_cache = build_suggestion_cache(
+    AI_CACHE_BACKEND, AI_CACHE_TTL_SECONDS, AI_CACHE_MAX_ENTRIES, AI_CACHE_REDIS_URL
+)
+
+
+def _import_httpx():
+    try:
+        import httpx  # openai 的依赖
+    except ImportError:  # pragma: no cover - 新版 openai 改为依赖 httpx2
+        import httpx2 as httpx
+    return httpx
 
 
-def _get_llm_client() -> OpenAI:
+def _is_upstream_failure(exc: BaseException) -> bool:
+    """超时、连接错误、429 与 5xx 说明上游异常，计入熔断；400/401 等是请求本身的问题。"""
+    if isinstance(exc, APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    if isinstance(exc, (APIConnectionError, TimeoutError, ConnectionError)):  # 含 APITimeoutError
+        return True
+    # 流式输出中途的读超时 / 断开由 httpx 直接抛出
+    return isinstance(exc, _import_httpx().TransportError)
+
+
+# 上游熔断与相同请求合并（进程内）
+llm_breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_SLOW_SECONDS, LLM_BREAKER_RESET_SECONDS,
+                             is_failure=_is_upstream_failure)
+llm_flights = SingleFlight()
+
+
+def _build_llm_client() -> OpenAI:
     if OpenAI is None:
         raise RuntimeError("未安装 openai 库，请执行 `pip install openai`.")
 
@@ -28,7 +71,67 @@ def _get_llm_client() -> OpenAI:
     if not LLM_MODEL or not LLM_MODEL.strip():
         raise RuntimeError(f"未配置 LLM_MODEL 或 OPENAI_MODEL，无法调用大模型。当前值: '{LLM_MODEL}'")
 
-    return OpenAI(api_key=LLM_API_KEY.strip(), base_url=LLM_BASE_URL.strip())
+    httpx = _import_httpx()
+    timeout = httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+    http_client = httpx.Client(
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=LLM_POOL_SIZE, max_keepalive_connections=LLM_POOL_SIZE),
+    )
+    # openai 客户端自带 429/5xx/连接错误的指数退避重试
+    return OpenAI(
+        api_key=LLM_API_KEY.strip(),
+        base_url=LLM_BASE_URL.strip(),
+        timeout=timeout,
+        max_retries=LLM_MAX_RETRIES,
+        http_client=http_client,
+    )
+
+
+class _LLMClientManager:
+    """进程级 LLM 客户端：复用 HTTP 连接池，线程安全，fork 后在子进程中重建。"""
+
+    def __init__(self):
+        self._client: Optional[OpenAI] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> OpenAI:
+        client = self._client
+        if client is not None and self._pid == os.getpid():
+            return client
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                self._client = _build_llm_client()
+                self._pid = os.getpid()
+            return self._client
+
+    def reset_after_fork(self) -> None:
+        # 子进程不能复用父进程的连接（socket 共享会串包），直接丢弃即可
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+
+_client_manager = _LLMClientManager()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_client_manager.reset_after_fork)
+
+
+def _get_llm_client() -> OpenAI:
+    return _client_manager.get()
+
+
+def _create_completion(client: OpenAI, **kwargs):
+    """经熔断器调用大模型；熔断打开时直接抛出 CircuitOpenError，不访问上游。"""
+    with llm_breaker.guard(), track("llm"):
+        return client.chat.completions.create(**kwargs)
+
+
+def _llm_error_message(exc: Exception) -> str:
+    if isinstance(exc, CircuitOpenError):
+        return str(exc)
+    return f"大模型调用失败：{exc}"
 
 
 def generate_record_suggestion(
@@ -37,8 +140,9 @@ def generate_record_suggestion(
     allergy_history: Optional[str] = None,
     age: Optional[int] = None,
     gender: Optional[str] = None,
+    use_cache: bool = True,
 ) -> Dict[str, str]:
-    """根据症状生成诊断与治疗方案建议。"""
+    """根据症状生成诊断与治疗方案建议；use_cache=False 时跳过缓存直接调用模型。"""
 
     if not symptom:
         return {
@@ -47,6 +151,26 @@ def generate_record_suggestion(
             "message": "症状信息为空，无法生成建议"
         }
 
+    cache_key = make_cache_key(symptom, medical_history, allergy_history, age, gender, LLM_MODEL, PROMPT_VERSION)
+    # 同一时刻的相同请求只调用一次大模型
+    return dict(suggestion_cache.get_or_compute(
+        cache_key,
+        lambda: llm_flights.do(
+            ("record", cache_key),
+            lambda: _request_record_suggestion(symptom, medical_history, allergy_history, age, gender),
+        ),
+        bypass=not use_cache,
+        cacheable=lambda result: not result.get("message"),
+    ))
+
+
+def _request_record_suggestion(
+    symptom: str,
+    medical_history: Optional[str],
+    allergy_history: Optional[str],
+    age: Optional[int],
+    gender: Optional[str],
+) -> Dict[str, str]:
     try:
         client = _get_llm_client()
     except RuntimeError as exc:  # 未配置或未安装
@@ -56,37 +180,20 @@ def generate_record_suggestion(
             "message": str(exc)
         }
 
-    prompt = f"""
-你是一名资深临床医生助手，请基于以下信息给出诊断与治疗方案建议。
-
-输出要求：
-1. 使用简体中文。
-2. 返回 JSON 格式，字段包含 diagnosis（诊断建议）与 treatment_plan（治疗方案建议），不要额外字段。
-3. 内容需专业、清晰，可落地执行。
-
-患者信息：
-- 症状：{symptom}
-- 既往病史：{medical_history or '未提供'}
-- 过敏史：{allergy_history or '未提供'}
-- 年龄：{age if age is not None else '未提供'}
-- 性别：{gender or '未提供'}
-"""
-
     try:
-        response = client.chat.completions.create(
+        response = _create_completion(
+            client,
             model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": "你是专业且谨慎的临床医生助手。"},
-                {"role": "user", "content": prompt},
-            ],
+            messages=_record_suggestion_messages(symptom, medical_history, allergy_history, age, gender),
             temperature=0.4,
             max_tokens=800,
         )
-    except Exception as exc:  # pragma: no cover - 网络/鉴权错误
+    except Exception as exc:  # pragma: no cover - 网络/鉴权错误、熔断
         return {
             "diagnosis": "",
             "treatment_plan": "",
-            "message": f"大模型调用失败：{exc}"
+            "message": _llm_error_message(exc),
+            "circuit_open": isinstance(exc, CircuitOpenError),
         }
 
     content = response.choices[0].message.content.strip() if response.choices else ""
@@ -107,8 +214,222 @@ def generate_record_suggestion(
     }
 
 
-def suggest_templates_by_symptom(symptom: str, templates: List[Dict]) -> List[Dict]:
-    """基于症状使用AI进行智能模板推荐。"""
+def _record_suggestion_messages(
+    symptom: str,
+    medical_history: Optional[str],
+    allergy_history: Optional[str],
+    age: Optional[int],
+    gender: Optional[str],
+) -> List[Dict[str, str]]:
+    prompt = f"""
+你是一名资深临床医生助手，请基于以下信息给出诊断与治疗方案建议。
+
+输出要求：
+1. 使用简体中文。
+2. 返回 JSON 格式，字段包含 diagnosis（诊断建议）与 treatment_plan（治疗方案建议），不要额外字段。
+3. 内容需专业、清晰，可落地执行。
+
+患者信息：
+- 症状：{symptom}
+- 既往病史：{medical_history or '未提供'}
+- 过敏史：{allergy_history or '未提供'}
+- 年龄：{age if age is not None else '未提供'}
+- 性别：{gender or '未提供'}
+"""
+    return [
+        {"role": "system", "content": "你是专业且谨慎的临床医生助手。"},
+        {"role": "user", "content": prompt},
+    ]
+
+
+class _JsonFieldStreamParser:
+    """增量解析模型流式输出的扁平 JSON 对象，逐字吐出指定字符串字段的内容。
+
+    只处理第一层的字符串值；`{` 之前的内容（如 ```json 代码块标记）会被忽略。
+    """
+
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self, fields: Tuple[str, ...]):
+        self.fields = fields
+        self.values: Dict[str, str] = {}
+        self._depth = 0
+        self._expect_key = False
+        self._in_string = False
+        self._is_key = False
+        self._key = ""
+        self._current_key: Optional[str] = None
+        self._escape: Optional[str] = None  # None / "" / "uXXXX" 前缀
+
+    @property
+    def found(self) -> bool:
+        return bool(self.values)
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        deltas: List[Tuple[str, str]] = []
+        for char in text:
+            if self._in_string:
+                piece = self._consume_string_char(char)
+                if piece and not self._is_key and self._depth == 1 and self._current_key in self.fields:
+                    self.values[self._current_key] = self.values.get(self._current_key, "") + piece
+                    if deltas and deltas[-1][0] == self._current_key:
+                        deltas[-1] = (self._current_key, deltas[-1][1] + piece)
+                    else:
+                        deltas.append((self._current_key, piece))
+                continue
+
+            if char == "{":
+                self._depth += 1
+                self._expect_key = True
+            elif char == "}":
+                self._depth = max(0, self._depth - 1)
+            elif self._depth == 0:
+                continue
+            elif char == ",":
+                self._expect_key = True
+            elif char == ":":
+                self._expect_key = False
+            elif char == '"':
+                self._in_string = True
+                self._is_key = self._expect_key
+                if self._is_key:
+                    self._key = ""
+                elif self._depth == 1 and self._current_key in self.fields:
+                    self.values.setdefault(self._current_key, "")
+        return deltas
+
+    def _consume_string_char(self, char: str) -> str:
+        """处理字符串内的一个字符，返回解码后的文本（可能为空）。"""
+        if self._escape is not None:
+            if self._escape == "" and char != "u":
+                self._escape = None
+                decoded = self._ESCAPES.get(char, char)
+            else:
+                self._escape += char
+                if len(self._escape) < 5:
+                    return ""
+                code, self._escape = self._escape[1:], None
+                try:
+                    decoded = chr(int(code, 16))
+                except ValueError:
+                    decoded = ""
+        elif char == "\\":
+            self._escape = ""
+            return ""
+        elif char == '"':
+            self._in_string = False
+            if self._is_key:
+                self._current_key = self._key
+            return ""
+        else:
+            decoded = char
+
+        if self._is_key:
+            self._key += decoded
+            return ""
+        return decoded
+
+
+def _timed_chunks(stream) -> Iterator:
+    # 只统计等待模型返回的时间，不含把片段发给前端的时间
+    chunks = iter(stream)
+    while True:
+        with track("llm"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def stream_record_suggestion(
+    symptom: str,
+    medical_history: Optional[str] = None,
+    allergy_history: Optional[str] = None,
+    age: Optional[int] = None,
+    gender: Optional[str] = None,
+    use_cache: bool = True,
+) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """流式生成诊断与治疗方案建议，逐个产出 (事件名, 数据)。
+
+    - ``reasoning``：推理模型的思考过程片段 ``{"text": ...}``；
+    - ``delta``：字段增量 ``{"field": "diagnosis"|"treatment_plan", "text": ...}``；
+    - ``done``：完整结果 ``{"diagnosis": ..., "treatment_plan": ...}``；
+    - ``error``：失败原因 ``{"message": ...}``。
+    """
+
+    if not symptom:
+        yield "error", {"message": "症状信息为空，无法生成建议"}
+        return
+
+    cache_key = make_cache_key(symptom, medical_history, allergy_history, age, gender, LLM_MODEL, PROMPT_VERSION)
+    cached = suggestion_cache.get(cache_key) if use_cache else None
+    if cached is not None:
+        for field in ("diagnosis", "treatment_plan"):
+            if cached.get(field):
+                yield "delta", {"field": field, "text": cached[field]}
+        yield "done", {"diagnosis": cached.get("diagnosis", ""), "treatment_plan": cached.get("treatment_plan", "")}
+        return
+
+    try:
+        client = _get_llm_client()
+    except RuntimeError as exc:  # 未配置或未安装
+        yield "error", {"message": str(exc)}
+        return
+
+    parser = _JsonFieldStreamParser(("diagnosis", "treatment_plan"))
+    content_parts: List[str] = []
+
+    try:
+        # 熔断器只统计到开始返回为止的耗时，推理模型完整输出本来就慢
+        stream = _create_completion(
+            client,
+            model=LLM_MODEL,
+            messages=_record_suggestion_messages(symptom, medical_history, allergy_history, age, gender),
+            temperature=0.4,
+            max_tokens=800,
+            stream=True,
+        )
+    except Exception as exc:  # pragma: no cover - 网络/鉴权错误、熔断
+        yield "error", {"message": _llm_error_message(exc)}
+        return
+
+    try:
+        for chunk in _timed_chunks(stream):
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            reasoning = getattr(delta, "reasoning_content", None)
+            if reasoning:
+                yield "reasoning", {"text": reasoning}
+            text = delta.content
+            if not text:
+                continue
+            content_parts.append(text)
+            for field, piece in parser.feed(text):
+                yield "delta", {"field": field, "text": piece}
+    except Exception as exc:  # pragma: no cover - 输出中途断开
+        llm_breaker.record_exception(exc)
+        yield "error", {"message": f"大模型调用失败：{exc}"}
+        return
+
+    if parser.found:
+        diagnosis = parser.values.get("diagnosis", "").strip()
+        plan = parser.values.get("treatment_plan", "").strip()
+    else:
+        # 与非流式接口一致：未返回 JSON 时整段文本作为治疗方案
+        diagnosis = ""
+        plan = "".join(content_parts).strip()
+
+    suggestion_cache.set(cache_key, {"diagnosis": diagnosis, "treatment_plan": plan, "message": ""})
+    yield "done", {"diagnosis": diagnosis, "treatment_plan": plan}
+
+
+def suggest_templates_by_symptom(symptom: str, templates: List[Dict], ranked: bool = False) -> List[Dict]:
+    """基于症状使用AI进行智能模板推荐。
+
+    ranked=True 表示 templates 已由本地检索按相关度排好序（带 score），
+    大模型不可用时直接返回该顺序。
+    """
     if not symptom:
         return []
 
@@ -116,11 +437,19 @@ def suggest_templates_by_symptom(symptom: str, templates: List[Dict]) -> List[Di
     if not templates:
         return []
 
+    def fallback() -> List[Dict]:
+        if ranked:
+            return [
+                {"id": tpl.get("id"), "name": tpl.get("name"), "score": tpl.get("score"), "reason": "本地检索匹配"}
+                for tpl in templates
+            ]
+        return _fallback_keyword_match(symptom, templates)
+
     try:
         client = _get_llm_client()
     except RuntimeError:
-        # 如果无法获取AI客户端，降级为关键词匹配（保留原逻辑作为fallback）
-        return _fallback_keyword_match(symptom, templates)
+        # 如果无法获取AI客户端，降级为本地检索结果/关键词匹配
+        return fallback()
 
     # 构建模板列表供AI分析
     template_summaries = []
@@ -164,19 +493,19 @@ def suggest_templates_by_symptom(symptom: str, templates: List[Dict]) -> List[Di
 4. 不要返回其他内容，只返回JSON
 """
 
+    messages = [
+        {"role": "system", "content": "你是专业的医疗助手，擅长分析症状并匹配最合适的病历模板。"},
+        {"role": "user", "content": prompt},
+    ]
     try:
-        response = client.chat.completions.create(
-            model=LLM_MODEL,
-            messages=[
-                {"role": "system", "content": "你是专业的医疗助手，擅长分析症状并匹配最合适的病历模板。"},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.3,
-            max_tokens=300,
+        # 相同症状与候选模板的并发请求共享一次调用
+        response = llm_flights.do(
+            ("templates", LLM_MODEL, prompt),
+            lambda: _create_completion(client, model=LLM_MODEL, messages=messages, temperature=0.3, max_tokens=300),
         )
     except Exception:
-        # AI调用失败，降级为关键词匹配
-        return _fallback_keyword_match(symptom, templates)
+        # AI调用失败或已熔断，降级为本地检索结果/关键词匹配
+        return fallback()
 
     content = response.choices[0].message.content.strip() if response.choices else ""
 
@@ -203,52 +532,26 @@ def suggest_templates_by_symptom(symptom: str, templates: List[Dict]) -> List[Di
             }]
 
     except json.JSONDecodeError:
-        # JSON解析失败，降级为关键词匹配
-        return _fallback_keyword_match(symptom, templates)
+        # JSON解析失败，降级为本地检索结果/关键词匹配
+        return fallback()
 
     return []
 
 
-def _fallback_keyword_match(symptom: str, templates: List[Dict]) -> List[Dict]:
-    """关键词匹配（作为AI调用失败时的降级方案）。"""
+def _fallback_keyword_match(symptom: str, templates: List[Dict], k: int = 1) -> List[Dict]:
+    """关键词匹配（作为AI调用失败时的降级方案），返回 BM25 得分最高的 k 个模板。
+
+    只在本地召回没有命中时调用，templates 是最近更新的至多 TEMPLATE_CANDIDATES_K
+    个模板，每次临时建索引即可，不做缓存。与召回索引不同，这里也匹配治疗方案。
+    """
     if not symptom or not templates:
         return []
 
-    symptom_lower = symptom.lower()
-    suggestions: List[Dict] = []
-
-    for tpl in templates:
-        content = tpl.get("content", {})
-        if isinstance(content, str):
-            try:
-                content = json.loads(content)
-            except Exception:
-                content = {"symptom": content}
-
-        text_parts = [
-            tpl.get("name", ""),
-            content.get("symptom", ""),
-            content.get("diagnosis", ""),
-            content.get("treatment_plan", ""),
-        ]
-        merged_text = "\n".join(text_parts).lower()
-
-        if not merged_text.strip():
-            continue
-
-        score = merged_text.count(symptom_lower)
-        for token in symptom_lower.split():
-            if token and token in merged_text:
-                score += 1
-
-        if score > 0:
-            suggestions.append({
-                "id": tpl.get("id"),
-                "name": tpl.get("name"),
-                "score": score,
-            })
-
-    suggestions.sort(key=lambda item: item["score"], reverse=True)
-    return suggestions[:1] if suggestions else []
-
-
+    index = TemplateIndex()
+    for position, tpl in enumerate(templates):
+        text = template_text(tpl.get("name"), tpl.get("content", {}), include_plan=True)
+        index.upsert(position, text, template_id=tpl.get("id"), name=tpl.get("name"))
+    return [
+        {"id": hit["template_id"], "name": hit["name"], "score": hit["score"]}
+        for hit in index.search(symptom, k=k)
+    ]
@@ -0,0 +1,98 @@
+"""AI 批量建议基准：查房场景下逐个请求与批量接口的对比（假大模型，带注入延迟）。
+
+    python benchmarks/bench_ai_batch.py [病人数] [模型延迟秒数] [重复症状数]
+
+逐个请求模式按顺序调用 /api/ai/generate_record_suggestion；批量模式一次提交全部
+病人，统计首条结果时间、总耗时与实际调用模型的次数（相同症状只调用一次）。
+两种模式都带 no_cache，排除建议缓存的影响。
+
+批量接口的行为（每项一行、相同输入只调用一次、空症状返回错误行、按完成顺序
+返回）由 tests/test_ai_batch.py 检查，这里只做计时。
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm_server import start_fake_llm_server  # noqa: E402
+
+PATIENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+DUPLICATES = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+_server, _base_url = start_fake_llm_server(latency=LATENCY)
+os.environ['LLM_BASE_URL'] = _base_url
+os.environ.setdefault('LLM_API_KEY', 'sk-fake')
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+from app import create_app, db, ai_batches  # noqa: E402
+from config import AI_BATCH_CONCURRENCY  # noqa: E402
+
+app = create_app()
+
+
+def _items():
+    # 最后 DUPLICATES 个病人与前面的病人症状相同
+    unique = PATIENTS - DUPLICATES
+    return [
+        {'symptom': f'发热、咳嗽第 {i % unique} 天', 'age': 30 + i % unique, 'gender': '男'}
+        for i in range(PATIENTS)
+    ]
+
+
+def _token(client):
+    client.post('/api/register', json={'username': 'bench', 'password': 'bench'})
+    return client.post('/api/login', json={'username': 'bench', 'password': 'bench'}).get_json()['access_token']
+
+
+def run_serial(client, headers, items):
+    begin = time.perf_counter()
+    first = None
+    for item in items:
+        response = client.post('/api/ai/generate_record_suggestion', json=dict(item, no_cache=True), headers=headers)
+        assert response.status_code == 200, response.get_json()
+        first = first or time.perf_counter() - begin
+    return first, time.perf_counter() - begin
+
+
+def run_batch(client, headers, items):
+    begin = time.perf_counter()
+    first = None
+    response = client.post('/api/ai/generate_record_suggestion/batch',
+                           json={'items': items, 'no_cache': True}, headers=headers, buffered=False)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    for line in response.response:
+        for row in line.decode('utf-8').splitlines():
+            if 'diagnosis' in json.loads(row):
+                first = first or time.perf_counter() - begin
+    return first, time.perf_counter() - begin
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {_token(client)}'}
+    items = _items()
+    handler = _server.RequestHandlerClass
+
+    calls = handler.request_count
+    first, total = run_serial(client, headers, items)
+    print(f'serial: {PATIENTS} requests, first result {first:.2f}s, total {total:.2f}s, '
+          f'LLM calls {handler.request_count - calls}')
+
+    calls = handler.request_count
+    first, total = run_batch(client, headers, items)
+    print(f'batch : {PATIENTS} items, first result {first:.2f}s, total {total:.2f}s, '
+          f'LLM calls {handler.request_count - calls}, concurrency {AI_BATCH_CONCURRENCY}')
+    ai_batches.shutdown()
+    _server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""AI 异步任务基准：对比同步调用与任务模式在假大模型（带注入延迟）下的表现。
+
+    python benchmarks/bench_ai_jobs.py [并发请求数] [模型延迟秒数]
+
+同步模式下每个请求都占用一个 Web 线程直到模型返回；任务模式下提交立即返回，
+模型调用由 AI_JOB_MAX_WORKERS 大小的线程池限流执行。
+
+任务模式的行为（提交立即返回、轮询得到结果、排队已满时返回 503）由
+tests/test_ai_jobs.py 检查，这里只做计时。
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm_server import start_fake_llm_server  # noqa: E402
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+
+_server, _base_url = start_fake_llm_server(latency=LATENCY)
+os.environ['LLM_BASE_URL'] = _base_url
+os.environ.setdefault('LLM_API_KEY', 'sk-fake')
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+from app import create_app, db, ai_jobs  # noqa: E402
+
+app = create_app()
+
+PAYLOAD = {'symptom': '发热、咳嗽三天', 'age': 30, 'gender': '男'}
+
+
+def _token(client):
+    client.post('/api/register', json={'username': 'bench', 'password': 'bench'})
+    return client.post('/api/login', json={'username': 'bench', 'password': 'bench'}).get_json()['access_token']
+
+
+def run_sync(headers):
+    durations = []
+
+    def worker():
+        client = app.test_client()
+        begin = time.perf_counter()
+        response = client.post('/api/ai/generate_record_suggestion', json=PAYLOAD, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        durations.append(time.perf_counter() - begin)
+
+    begin = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(REQUESTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - begin, durations
+
+
+def run_async(headers):
+    client = app.test_client()
+    submit_durations = []
+    job_ids = []
+    begin = time.perf_counter()
+    for _ in range(REQUESTS):
+        submit_begin = time.perf_counter()
+        response = client.post('/api/ai/generate_record_suggestion?async=1', json=PAYLOAD, headers=headers)
+        assert response.status_code == 202, response.get_json()
+        submit_durations.append(time.perf_counter() - submit_begin)
+        job_ids.append(response.get_json()['job_id'])
+
+    for job_id in job_ids:
+        result = client.get(f'/api/ai/jobs/{job_id}?wait=30', headers=headers).get_json()
+        assert result['status'] == 'succeeded', result
+    return time.perf_counter() - begin, submit_durations
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+    headers = {'Authorization': f'Bearer {_token(app.test_client())}'}
+
+    total, durations = run_sync(headers)
+    print(f'sync : {REQUESTS} requests, wall {total:.2f}s, '
+          f'request p50 {statistics.median(durations) * 1000:.1f}ms (每个请求占用 Web 线程直到模型返回)')
+
+    total, submit_durations = run_async(headers)
+    print(f'async: {REQUESTS} jobs, wall {total:.2f}s, submit p50 {statistics.median(submit_durations) * 1000:.1f}ms, '
+          f'pool size {ai_jobs.max_workers}')
+    ai_jobs.shutdown()
+    _server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""时序分析基准：现场聚合（medical_records JOIN patients GROUP BY）vs 读取汇总表。
+
+用法（在 backend 目录下）：
+
+    python benchmarks/bench_analytics.py                 # 默认 1M 病历
+    python benchmarks/bench_analytics.py 10000000        # 10M 病历（生成数据需要较长时间）
+
+病历均匀分布在 3 年内，诊断取自 200 个常见诊断。使用临时 SQLite 文件库。
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+_DB_DIR = tempfile.mkdtemp(prefix='hms_bench_')
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app import create_app, db, Patient, MedicalRecord, VisitRollup, DiagnosisRollup, VALID_DEPARTMENTS  # noqa: E402
+
+app = create_app()
+from record_rollups import backfill, top_diagnoses, visit_series  # noqa: E402
+
+PATIENTS = 100000
+DAYS = 3 * 365
+DIAGNOSES = [f'诊断{i:03d}' for i in range(200)]
+REPEAT = 5
+FIRST_DAY = datetime(2023, 1, 1)
+
+
+def _seed(records, rng):
+    db.session.execute(Patient.__table__.insert(), [{
+        'id': i + 1,
+        'name': f'病人{i}',
+        'id_card': f"{110101199000000000 + i:018d}",
+        'department': VALID_DEPARTMENTS[i % len(VALID_DEPARTMENTS)],
+    } for i in range(PATIENTS)])
+    batch = 50000
+    for start in range(0, records, batch):
+        db.session.execute(MedicalRecord.__table__.insert(), [{
+            'patient_id': rng.randint(1, PATIENTS),
+            'record_date': FIRST_DAY + timedelta(seconds=rng.randint(0, DAYS * 86400 - 1)),
+            'diagnosis': rng.choice(DIAGNOSES),
+            'treatment_plan': '对症治疗',
+        } for _ in range(min(batch, records - start))])
+    db.session.commit()
+
+
+def _adhoc_visits(period, start, end):
+    # 现场聚合：只按天分组，周 / 月在此基础上折算的开销可以忽略
+    records = MedicalRecord.__table__
+    patients = Patient.__table__
+    day = func.date(records.c.record_date)
+    return db.session.execute(
+        select(day, patients.c.department, func.count())
+        .select_from(records.join(patients, patients.c.id == records.c.patient_id))
+        .where(records.c.record_date >= start, records.c.record_date < end + timedelta(days=1))
+        .group_by(day, patients.c.department)
+    ).all()
+
+
+def _adhoc_diagnoses(period, start, end):
+    records = MedicalRecord.__table__
+    patients = Patient.__table__
+    day = func.date(records.c.record_date)
+    return db.session.execute(
+        select(day, records.c.diagnosis, func.count())
+        .select_from(records.join(patients, patients.c.id == records.c.patient_id))
+        .where(records.c.record_date >= start, records.c.record_date < end + timedelta(days=1))
+        .group_by(day, records.c.diagnosis)
+    ).all()
+
+
+def _time(func_):
+    samples = []
+    for _ in range(REPEAT):
+        begin = time.perf_counter()
+        func_()
+        samples.append((time.perf_counter() - begin) * 1000)
+    return statistics.median(samples)
+
+
+def main(records):
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        begin = time.perf_counter()
+        _seed(records, rng)
+        print(f'records: {records}  seed {time.perf_counter() - begin:.1f}s')
+
+        begin = time.perf_counter()
+        written = backfill(db.session, Patient.__table__, MedicalRecord.__table__,
+                           VisitRollup.__table__, DiagnosisRollup.__table__)
+        print(f'backfill {time.perf_counter() - begin:.1f}s  {written}')
+
+        start, end = date(2024, 1, 1), date(2024, 12, 31)
+        print(f"{'query (1 year)':<24} {'ad hoc p50':>12} {'rollup p50':>12}")
+        for period in ('day', 'week', 'month'):
+            adhoc = _time(lambda: _adhoc_visits(period, start, end))
+            rollup = _time(lambda: visit_series(db.session, VisitRollup.__table__, period, start, end))
+            print(f"{'visits/' + period:<24} {adhoc:>10.1f}ms {rollup:>10.2f}ms")
+        for period in ('week', 'month'):
+            adhoc = _time(lambda: _adhoc_diagnoses(period, start, end))
+            rollup = _time(lambda: top_diagnoses(db.session, DiagnosisRollup.__table__, period, start, end))
+            print(f"{'top diagnoses/' + period:<24} {adhoc:>10.1f}ms {rollup:>10.2f}ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,101 @@
+"""导出吞吐与内存基准：流式导出 vs 旧的 ORM 对象 + to_dict() 全量构造。
+
+用法（在 backend 目录下）：
+
+    python benchmarks/bench_export.py              # 默认 100k 病人 / 200k 病历
+    python benchmarks/bench_export.py 500000 1000000
+
+使用临时 SQLite 文件库；内存峰值由 tracemalloc 统计（仅 Python 分配），与计时分开测量。
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+_DB_DIR = tempfile.mkdtemp(prefix='hms_bench_')
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db, Patient, MedicalRecord  # noqa: E402
+
+app = create_app()
+from patient_export import build_export_query, iter_export  # noqa: E402
+
+DEPARTMENTS = ['内科', '外科', '妇产科', '儿科']
+
+
+def _seed(patients, records, rng):
+    base = datetime(2024, 1, 1)
+    batch = 10000
+    for start in range(0, patients, batch):
+        db.session.execute(Patient.__table__.insert(), [{
+            'id': i + 1,
+            'name': f'病人{i}',
+            'id_card': f"{110101199000000000 + i:018d}",
+            'age': rng.randint(1, 90),
+            'gender': rng.choice(['男', '女']),
+            'department': rng.choice(DEPARTMENTS),
+            'created_at': base + timedelta(minutes=i),
+        } for i in range(start, min(start + batch, patients))])
+    for start in range(0, records, batch):
+        db.session.execute(MedicalRecord.__table__.insert(), [{
+            'id': i + 1,
+            'patient_id': rng.randint(1, patients),
+            'record_date': base + timedelta(minutes=i),
+            'symptom': '发热、咳嗽三天，伴咽痛',
+            'diagnosis': '急性上呼吸道感染' * 4,
+            'treatment_plan': '对症治疗，多饮水，注意休息',
+        } for i in range(start, min(start + batch, records))])
+    db.session.commit()
+
+
+def _legacy(model):
+    # 旧方式：加载全部 ORM 对象后逐个 to_dict()
+    rows = model.query.order_by(model.id).all()
+    return sum(len(json.dumps(row.to_dict(), ensure_ascii=False)) + 1 for row in rows), len(rows)
+
+
+def _streamed(entity, fmt):
+    stmt = build_export_query(entity, Patient.__table__, MedicalRecord.__table__)
+    size = sum(len(chunk) for chunk in iter_export(db.session, stmt, fmt))
+    return size, None
+
+
+def _measure(label, func, count):
+    # tracemalloc 本身会显著拖慢执行，吞吐与内存峰值分两次测量
+    db.session.expunge_all()
+    begin = time.perf_counter()
+    _, rows = func()
+    elapsed = time.perf_counter() - begin
+    rows = rows or count
+
+    db.session.expunge_all()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed:>7.2f}s {rows / elapsed:>10.0f} rows/s  peak {peak / 1024 / 1024:>7.1f}MB")
+
+
+def main(patients, records):
+    rng = random.Random(42)
+    with app.app_context():
+        db.create_all()
+        _seed(patients, records, rng)
+        print(f'patients: {patients}  records: {records}')
+        _measure('patients legacy to_dict', lambda: _legacy(Patient), patients)
+        _measure('patients stream ndjson', lambda: _streamed('patients', 'ndjson'), patients)
+        _measure('patients stream csv', lambda: _streamed('patients', 'csv'), patients)
+        _measure('records legacy to_dict', lambda: _legacy(MedicalRecord), records)
+        _measure('records stream ndjson', lambda: _streamed('records', 'ndjson'), records)
+        _measure('records stream csv', lambda: _streamed('records', 'csv'), records)
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    main(args[0] if args else 100000, args[1] if len(args) > 1 else 200000)
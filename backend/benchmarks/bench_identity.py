@@ -0,0 +1,58 @@
+"""当前用户解析开销基准：每请求查询 users 表（旧路径）vs JWT uid 声明。
+
+    python benchmarks/bench_identity.py [请求数]
+
+对空模板库的 GET /api/templates（最轻的需要当前用户的接口）计时，
+差值即为每个请求查询 users 表的开销。
+旧路径使用不带 uid 声明的 token，并在每次请求前清空用户缓存。
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from app import create_app, db, user_identity_cache  # noqa: E402
+
+app = create_app()
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+
+def _measure(client, headers, before_each=None):
+    samples = []
+    for _ in range(REQUESTS):
+        if before_each:
+            before_each()
+        begin = time.perf_counter()
+        response = client.get('/api/templates', headers=headers)
+        assert response.status_code == 200
+        samples.append((time.perf_counter() - begin) * 1000)
+    return statistics.mean(samples), statistics.median(samples)
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        client.post('/api/register', json={'username': 'bench', 'password': 'bench'})
+        claims_token = client.post('/api/login', json={'username': 'bench', 'password': 'bench'}).get_json()['access_token']
+        legacy_token = create_access_token(identity='bench')
+
+    legacy = _measure(client, {'Authorization': f'Bearer {legacy_token}'}, before_each=user_identity_cache.clear)
+    cached = _measure(client, {'Authorization': f'Bearer {legacy_token}'})
+    claims = _measure(client, {'Authorization': f'Bearer {claims_token}'})
+    print(f'requests: {REQUESTS}')
+    print(f'users 查询（旧路径）: mean {legacy[0]:.3f}ms  p50 {legacy[1]:.3f}ms')
+    print(f'旧 token + TTL 缓存 : mean {cached[0]:.3f}ms  p50 {cached[1]:.3f}ms')
+    print(f'JWT uid 声明        : mean {claims[0]:.3f}ms  p50 {claims[1]:.3f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""大模型熔断与请求合并基准（假大模型，带注入延迟）。
+
+    python benchmarks/bench_llm_breaker.py [请求数]
+
+1. 上游变慢：假模型延迟 3s、客户端读超时 1s。不熔断时每个请求都等满超时；
+   熔断后（默认连续 5 次失败）其余请求立即降级为本地匹配或返回 503。
+2. 上游恢复：熔断 LLM_BREAKER_RESET_SECONDS 秒后放行一个试探请求，成功即关闭。
+3. 请求合并：并发发送相同症状的请求（no_cache），统计实际调用模型的次数。
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm_server import start_fake_llm_server  # noqa: E402
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+_server, _base_url = start_fake_llm_server(latency=3.0)
+os.environ['LLM_BASE_URL'] = _base_url
+os.environ.setdefault('LLM_API_KEY', 'sk-fake')
+os.environ['LLM_READ_TIMEOUT'] = '1'
+os.environ['LLM_MAX_RETRIES'] = '0'
+os.environ.setdefault('LLM_BREAKER_RESET_SECONDS', '2')
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+import ai_service  # noqa: E402
+from app import create_app, db  # noqa: E402
+from llm_guard import CircuitBreaker  # noqa: E402
+
+app = create_app()
+handler = _server.RequestHandlerClass
+
+
+def _token(client):
+    client.post('/api/register', json={'username': 'bench', 'password': 'bench'})
+    return client.post('/api/login', json={'username': 'bench', 'password': 'bench'}).get_json()['access_token']
+
+
+def _reset_breaker(failure_threshold):
+    breaker = ai_service.llm_breaker
+    ai_service.llm_breaker = CircuitBreaker(failure_threshold, breaker.slow_seconds, breaker.reset_seconds,
+                                           is_failure=breaker.is_failure)
+
+
+def slow_upstream(client, headers, failure_threshold, label):
+    _reset_breaker(failure_threshold)
+    handler.latency = 3.0
+    calls = handler.request_count
+    statuses = []
+    begin = time.perf_counter()
+    for i in range(REQUESTS):
+        response = client.post('/api/ai/generate_record_suggestion',
+                               json={'symptom': f'头痛 {i}', 'no_cache': True}, headers=headers)
+        statuses.append(response.status_code)
+    total = time.perf_counter() - begin
+    print(f'{label:<12} {REQUESTS} requests, total {total:6.2f}s, upstream calls {handler.request_count - calls:3d}, '
+          f'status {dict((code, statuses.count(code)) for code in sorted(set(statuses)))}, '
+          f'breaker {ai_service.llm_breaker.state}')
+
+
+def recovery(client, headers):
+    handler.latency = 0.05
+    breaker = ai_service.llm_breaker
+    time.sleep(breaker.reset_seconds)
+    state = breaker.state
+    response = client.post('/api/ai/generate_record_suggestion', json={'symptom': '恢复', 'no_cache': True},
+                           headers=headers)
+    print(f'recovery     after {breaker.reset_seconds:g}s: {state} -> probe {response.status_code} -> {breaker.state}')
+
+
+def coalescing(headers):
+    _reset_breaker(5)
+    handler.latency = 0.5
+    calls = handler.request_count
+    shared = ai_service.llm_flights.shared
+    statuses = []
+
+    def worker():
+        response = app.test_client().post('/api/ai/generate_record_suggestion',
+                                          json={'symptom': '发热三天', 'no_cache': True}, headers=headers)
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(REQUESTS)]
+    begin = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f'coalescing   {REQUESTS} concurrent identical requests, total {time.perf_counter() - begin:.2f}s, '
+          f'upstream calls {handler.request_count - calls}, coalesced {ai_service.llm_flights.shared - shared}, '
+          f'all 200: {statuses.count(200) == REQUESTS}')
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {_token(client)}'}
+
+    slow_upstream(client, headers, failure_threshold=10 ** 9, label='no breaker')
+    slow_upstream(client, headers, failure_threshold=5, label='breaker')
+    recovery(client, headers)
+    coalescing(headers)
+    _server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""LLM 客户端复用基准：每次新建 OpenAI 客户端 vs 进程级复用客户端的单次调用开销。
+
+    python benchmarks/bench_llm_client.py [调用次数]
+
+对本地假大模型（零延迟）发起调用，差值即为客户端构造、连接建立等固定开销。
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_llm_server import start_fake_llm_server  # noqa: E402
+
+CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+_server, _base_url = start_fake_llm_server()
+os.environ['LLM_BASE_URL'] = _base_url
+os.environ.setdefault('LLM_API_KEY', 'sk-fake')
+
+import ai_service  # noqa: E402
+
+MESSAGES = [{'role': 'user', 'content': 'ping'}]
+
+
+def _measure(get_client):
+    samples = []
+    for _ in range(CALLS):
+        begin = time.perf_counter()
+        get_client().chat.completions.create(model=ai_service.LLM_MODEL, messages=MESSAGES, max_tokens=8)
+        samples.append((time.perf_counter() - begin) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    fresh = _measure(ai_service._build_llm_client)
+    pooled = _measure(ai_service._get_llm_client)
+    print(f'fresh client per call : mean {fresh[0]:.2f}ms  p95 {fresh[1]:.2f}ms')
+    print(f'pooled shared client  : mean {pooled[0]:.2f}ms  p95 {pooled[1]:.2f}ms')
+    _server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
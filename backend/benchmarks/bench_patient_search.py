@@ -0,0 +1,96 @@
+"""病人检索基准：对比旧的 `%关键字%` LIKE 扫描与索引检索在不同表规模下的延迟。
+
+用法（在 backend 目录下）：
+
+    python benchmarks/bench_patient_search.py            # 默认 1k / 10k / 100k
+    python benchmarks/bench_patient_search.py 1000 500000
+
+使用临时 SQLite 文件库，无需 MySQL。
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+_DB_DIR = tempfile.mkdtemp(prefix='hms_bench_')
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import or_  # noqa: E402
+
+from app import create_app, db, Patient, PatientNameGram  # noqa: E402
+
+app = create_app()
+from patient_search import build_search_filter, name_grams  # noqa: E402
+
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈'
+GIVEN = '伟芳娜秀英敏静丽强磊军洋勇艳杰娟涛明超秀兰霞平刚桂英华玉萍红娥玲芬燕彩春菊兰凤洁梅琳素云莲真环雪荣爱妹霞香月莺媛'
+DEPARTMENTS = ['内科', '外科', '妇产科', '儿科']
+REPEAT = 20
+
+
+def _seed(total, rng):
+    patients_table = Patient.__table__
+    grams_table = PatientNameGram.__table__
+    batch = 5000
+    for start in range(0, total, batch):
+        rows = []
+        for i in range(start, min(start + batch, total)):
+            name = rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN) for _ in range(rng.randint(1, 2)))
+            rows.append({
+                'id': i + 1,
+                'name': name,
+                'id_card': f"{110101199000000000 + i:018d}",
+                'age': rng.randint(1, 90),
+                'gender': rng.choice(['男', '女']),
+                'phone_number': f"1{rng.randint(3000000000, 9999999999)}",
+                'department': rng.choice(DEPARTMENTS),
+            })
+        db.session.execute(patients_table.insert(), rows)
+        db.session.execute(grams_table.insert(), [
+            {'gram': gram, 'patient_id': row['id']}
+            for row in rows for gram in name_grams(row['name'])
+        ])
+    db.session.commit()
+
+
+def _legacy_filter(term):
+    like = f"%{term}%"
+    return or_(Patient.name.like(like), Patient.id_card.like(like), Patient.phone_number.like(like))
+
+
+def _time(filter_factory, term):
+    samples = []
+    for _ in range(REPEAT):
+        begin = time.perf_counter()
+        Patient.query.filter(filter_factory(term)).order_by(Patient.created_at.desc()).limit(20).all()
+        samples.append((time.perf_counter() - begin) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main(sizes):
+    rng = random.Random(42)
+    terms = {
+        '姓名': '王芳',
+        '身份证前缀': '1101011990000001',
+        '手机号前缀': '1380',
+    }
+    print(f"{'rows':>8} {'query':<10} {'legacy p50':>11} {'legacy p95':>11} {'indexed p50':>12} {'indexed p95':>12}")
+    with app.app_context():
+        for total in sizes:
+            db.drop_all()
+            db.create_all()
+            _seed(total, rng)
+            for label, term in terms.items():
+                legacy = _time(_legacy_filter, term)
+                indexed = _time(lambda t: build_search_filter(t, Patient, PatientNameGram, db.session), term)
+                print(f"{total:>8} {label:<10} {legacy[0]:>9.2f}ms {legacy[1]:>9.2f}ms "
+                      f"{indexed[0]:>10.2f}ms {indexed[1]:>10.2f}ms")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
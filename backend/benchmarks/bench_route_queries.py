@@ -0,0 +1,17 @@
+"""嵌套病历路由的 SQL 语句数检查：每个接口执行的语句数超过预期时退出码为 1。
+
+    python benchmarks/bench_route_queries.py
+
+用例与语句数上限见 tests/test_route_queries.py，这里只是运行该测试模块，
+等同于在 backend 目录下执行 ``python -m pytest tests/test_route_queries.py``。
+"""
+
+import os
+import sys
+
+import pytest
+
+TESTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'test_route_queries.py')
+
+if __name__ == '__main__':
+    sys.exit(pytest.main(['-q', TESTS] + sys.argv[1:]))
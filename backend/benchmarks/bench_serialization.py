@@ -0,0 +1,96 @@
+"""列表接口序列化基准：每个请求消耗的 CPU 时间（process_time）。
+
+    python benchmarks/bench_serialization.py [--json auto|orjson|std] [--repeat 200]
+
+使用临时 SQLite 文件库，测试 GET /api/patients?per_page=100、病历列表（100 条）
+与模板列表（缓存未命中 / 命中）。用 ``--json std`` 与默认值对比 orjson 的效果；
+在旧版本代码上运行同一脚本即可得到改动前的数据。
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PATIENTS = 2000
+RECORDS = 100
+TEMPLATES = 500
+
+
+def _seed(db, Patient, MedicalRecord, Template):
+    now = datetime(2024, 5, 1, 8, 0, 0)
+    db.session.execute(Patient.__table__.insert(), [
+        {'name': f'病人{i}', 'id_card': f'110101199{i:09d}', 'age': i % 90, 'gender': '男女'[i % 2],
+         'phone_number': f'138{i:08d}', 'department': '内科', 'created_at': now - timedelta(minutes=i)}
+        for i in range(PATIENTS)
+    ])
+    db.session.execute(MedicalRecord.__table__.insert(), [
+        {'patient_id': 1, 'symptom': '发热、咳嗽、流涕三天，伴咽痛', 'diagnosis': '上呼吸道感染',
+         'treatment_plan': '多饮水、注意休息；对乙酰氨基酚 0.5g 必要时口服；三天后复诊。',
+         'medical_history': '既往体健', 'allergy_history': '青霉素过敏', 'record_date': now - timedelta(days=i)}
+        for i in range(RECORDS)
+    ])
+    content = json.dumps({'symptom': '发热、咳嗽', 'diagnosis': '上呼吸道感染', 'treatment_plan': '休息' * 20},
+                         ensure_ascii=False)
+    db.session.execute(Template.__table__.insert(), [
+        {'name': f'模板{i}', 'description': '基准测试模板', 'content': content, 'owner_id': 1, 'is_shared': True}
+        for i in range(TEMPLATES)
+    ])
+    db.session.commit()
+
+
+def _measure(client, headers, url, repeat, before=None):
+    samples = []
+    for _ in range(repeat):
+        if before:
+            before()
+        begin = time.process_time()
+        response = client.get(url, headers=headers)
+        response.get_data()
+        samples.append((time.process_time() - begin) * 1000)
+        assert response.status_code == 200, (url, response.status_code)
+    return statistics.mean(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--json', default='auto', choices=('auto', 'orjson', 'std'))
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+    os.environ['JSON_PROVIDER'] = args.json
+
+    from app import create_app, db, Patient, MedicalRecord, Template, template_serialization_cache
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    client.post('/api/register', json={'username': 'bench', 'password': 'bench'})
+    token = client.post('/api/login', json={'username': 'bench', 'password': 'bench'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    with app.app_context():
+        _seed(db, Patient, MedicalRecord, Template)
+
+    cases = [
+        ('patients per_page=100', '/api/patients?per_page=100&total=none', None),
+        ('records (100)', '/api/patients/1/records', None),
+        ('records fields=id,record_date,diagnosis_summary',
+         '/api/patients/1/records?fields=id,record_date,diagnosis_summary', None),
+        ('templates cache miss', '/api/templates', template_serialization_cache.clear),
+        ('templates cache hit', '/api/templates', None),
+    ]
+    print(f'json provider: {type(app.json).__name__}')
+    for name, url, before in cases:
+        cpu = _measure(client, headers, url, args.repeat, before)
+        print(f'{name:<50} cpu/request {cpu:8.3f}ms')
+
+
+if __name__ == '__main__':
+    main()
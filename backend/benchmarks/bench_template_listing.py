@@ -0,0 +1,73 @@
+"""模板列表序列化基准：GET /api/templates 在缓存未命中（等同旧实现）与命中时的耗时。
+
+    python benchmarks/bench_template_listing.py [模板数量]
+
+使用临时 SQLite 文件库。未命中时每个模板都要加载内容列、json.loads 并格式化
+时间字段；命中后只查询 (id, version) 并拼接预渲染的 JSON 片段。
+"""
+
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db, Template, template_serialization_cache  # noqa: E402
+
+app = create_app()
+
+TEMPLATES = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+REPEAT = 10
+
+
+def _seed(owner_id):
+    content = json.dumps({
+        'symptom': '发热、咳嗽、流涕三天，伴咽痛',
+        'diagnosis': '上呼吸道感染',
+        'treatment_plan': '多饮水、注意休息；对乙酰氨基酚 0.5g 必要时口服；三天后复诊。' * 3,
+        'medical_history': '既往体健',
+        'allergy_history': '青霉素过敏',
+    }, ensure_ascii=False)
+    db.session.execute(Template.__table__.insert(), [
+        {'name': f'模板{i}', 'description': '基准测试模板', 'content': content,
+         'owner_id': owner_id, 'is_shared': i % 2 == 0}
+        for i in range(TEMPLATES)
+    ])
+    db.session.commit()
+
+
+def _measure(client, headers, clear_cache):
+    samples = []
+    for _ in range(REPEAT):
+        if clear_cache:
+            template_serialization_cache.clear()
+        begin = time.perf_counter()
+        response = client.get('/api/templates', headers=headers)
+        response.get_data()
+        samples.append((time.perf_counter() - begin) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    client.post('/api/register', json={'username': 'bench', 'password': 'bench'})
+    token = client.post('/api/login', json={'username': 'bench', 'password': 'bench'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    with app.app_context():
+        _seed(owner_id=1)
+
+    cold = _measure(client, headers, clear_cache=True)
+    warm = _measure(client, headers, clear_cache=False)
+    print(f'templates: {TEMPLATES}')
+    print(f'cache miss (旧路径): median {cold:8.2f}ms')
+    print(f'cache hit          : median {warm:8.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""降级关键词匹配基准：逐模板扫描（旧实现）vs 临时 BM25 索引。
+
+    python benchmarks/bench_template_match.py [模板数量]
+
+降级匹配只在本地召回没有命中时调用，输入是最近更新的至多
+TEMPLATE_CANDIDATES_K 个模板，因此默认按该数量生成合成模板，统计两种实现
+单次查询（含建索引）的耗时。
+"""
+
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_service import _fallback_keyword_match  # noqa: E402
+from config import TEMPLATE_CANDIDATES_K  # noqa: E402
+
+TEMPLATES = int(sys.argv[1]) if len(sys.argv) > 1 else TEMPLATE_CANDIDATES_K
+QUERIES = ['发热咳嗽', '腹痛 腹泻', '头晕乏力', '胸闷气短', '皮疹瘙痒', '关节肿痛']
+SYMPTOMS = ['发热', '咳嗽', '流涕', '咽痛', '腹痛', '腹泻', '恶心', '呕吐', '头晕', '头痛', '乏力', '胸闷',
+            '气短', '心悸', '皮疹', '瘙痒', '关节肿痛', '腰痛', '尿频', '失眠']
+DIAGNOSES = ['上呼吸道感染', '急性胃肠炎', '偏头痛', '高血压', '冠心病', '荨麻疹', '类风湿关节炎',
+             '腰肌劳损', '尿路感染', '焦虑状态']
+
+
+def legacy_keyword_match(symptom, templates):
+    """改造前的实现：每次请求逐个模板解析 JSON、拼接文本并做子串计数。"""
+    symptom_lower = symptom.lower()
+    suggestions = []
+    for tpl in templates:
+        content = tpl.get("content", {})
+        if isinstance(content, str):
+            try:
+                content = json.loads(content)
+            except Exception:
+                content = {"symptom": content}
+        merged_text = "\n".join([
+            tpl.get("name", ""), content.get("symptom", ""),
+            content.get("diagnosis", ""), content.get("treatment_plan", ""),
+        ]).lower()
+        if not merged_text.strip():
+            continue
+        score = merged_text.count(symptom_lower)
+        for token in symptom_lower.split():
+            if token and token in merged_text:
+                score += 1
+        if score > 0:
+            suggestions.append({"id": tpl.get("id"), "name": tpl.get("name"), "score": score})
+    suggestions.sort(key=lambda item: item["score"], reverse=True)
+    return suggestions[:1]
+
+
+def make_templates(count, rng):
+    templates = []
+    for i in range(count):
+        symptom = '、'.join(rng.sample(SYMPTOMS, 3))
+        diagnosis = rng.choice(DIAGNOSES)
+        templates.append({
+            'id': i + 1,
+            'name': f'{diagnosis}模板{i}',
+            'content': json.dumps({'symptom': symptom, 'diagnosis': diagnosis,
+                                   'treatment_plan': '对症治疗，注意休息，定期复诊。'}, ensure_ascii=False),
+            'updated_at': '2026-10-18 10:00:00',
+        })
+    return templates
+
+
+def _time_ms(func, *args):
+    begin = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - begin) * 1000
+
+
+def main():
+    templates = make_templates(TEMPLATES, random.Random(7))
+
+    legacy = [_time_ms(legacy_keyword_match, query, templates) for query in QUERIES * 5]
+    bm25 = [_time_ms(_fallback_keyword_match, query, templates) for query in QUERIES * 5]
+
+    print(f'templates: {TEMPLATES}')
+    print(f'legacy scan: median {statistics.median(legacy):8.3f}ms per query')
+    print(f'BM25       : median {statistics.median(bm25):8.3f}ms per query (含建索引)')
+
+
+if __name__ == '__main__':
+    main()
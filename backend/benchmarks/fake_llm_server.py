@@ -0,0 +1,124 @@
+"""本地假大模型服务：兼容 OpenAI `/chat/completions` 接口，用于基准测试与联调。
+
+    python benchmarks/fake_llm_server.py --port 8001 --latency 2
+
+然后将 LLM_BASE_URL 指向 http://127.0.0.1:8001/v1 即可，不消耗真实额度。
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUGGESTION = {
+    'diagnosis': '上呼吸道感染（假模型输出）',
+    'treatment_plan': '多饮水、注意休息，必要时对症退热治疗。',
+}
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    latency = 0.0
+    # 提示词包含某个关键字时改用对应的延迟（秒），用于构造完成先后不同的调用
+    keyword_latency = {}
+    request_count = 0
+    _count_lock = threading.Lock()
+
+    def log_message(self, format, *args):  # noqa: A002 - 覆盖基类签名
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        with self._count_lock:
+            type(self).request_count += 1
+
+        prompt = '\n'.join(message.get('content', '') for message in body.get('messages', []))
+        latency = next((value for keyword, value in self.keyword_latency.items() if keyword in prompt), self.latency)
+        if latency:
+            time.sleep(latency)
+
+        template_ids = re.findall(r'模板ID=(\d+)', prompt)
+        if template_ids:
+            content = json.dumps({'selected_template_id': int(template_ids[0]), 'reason': '假模型选择第一个模板'},
+                                 ensure_ascii=False)
+        else:
+            content = json.dumps(SUGGESTION, ensure_ascii=False)
+
+        if body.get('stream'):
+            self._send_stream(body, content)
+            return
+
+        payload = json.dumps({
+            'id': 'chatcmpl-fake',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        }, ensure_ascii=False).encode('utf-8')
+
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端已超时断开（熔断基准中是预期情况）
+            self.close_connection = True
+
+    def _send_stream(self, body, content):
+        """以 SSE 分块返回，每块几个字符，模拟逐 token 输出。"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        step = 4
+        for start in range(0, len(content), step):
+            chunk = json.dumps({
+                'id': 'chatcmpl-fake',
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': body.get('model', 'fake'),
+                'choices': [{'index': 0, 'delta': {'content': content[start:start + step]}, 'finish_reason': None}],
+            }, ensure_ascii=False)
+            self._write_chunk(f'data: {chunk}\n\n'.encode('utf-8'))
+        self._write_chunk(b'data: [DONE]\n\n')
+        self._write_chunk(b'')
+
+    def _write_chunk(self, data):
+        self.wfile.write(f'{len(data):X}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+
+def start_fake_llm_server(latency: float = 0.0, port: int = 0, keyword_latency=None):
+    """在后台线程启动假服务，返回 (server, base_url)。"""
+    handler = type('ConfiguredFakeLLMHandler', (FakeLLMHandler,), {
+        'latency': latency, 'keyword_latency': dict(keyword_latency or {}), 'request_count': 0,
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}/v1'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help='每次调用的模拟延迟（秒）')
+    args = parser.parse_args()
+    server, base_url = start_fake_llm_server(args.latency, args.port)
+    print(f'fake LLM listening on {base_url}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,455 @@
+"""全接口基准测试：生成合成数据，逐个接口压测并输出 JSON 报告，可对比两次结果。
+
+用法（在 backend 目录下）：
+
+    python benchmarks/harness.py run --scale small -o base.json
+    python benchmarks/harness.py run --patients 50000 --records 200000 --templates 2000 -o new.json
+    python benchmarks/harness.py compare base.json new.json --threshold 0.2
+
+run：
+    - 默认使用临时 SQLite 文件库；设置 SQLALCHEMY_DATABASE_URI 可指向 MySQL 测试库
+      （表为空时才写入合成数据）；
+    - 启动本地假大模型（benchmarks/fake_llm_server.py），--llm-latency 指定每次调用的延迟；
+    - 通过 WSGI 测试客户端在进程内调用接口，测量的是应用本身的耗时（不含网络与 Web 服务器），
+      真实部署的吞吐请用 benchmarks/load_test.py；
+    - 每个场景执行 --requests 次（AI 场景为 --ai-requests 次），--concurrency 个线程并发。
+
+输出 JSON：``meta``（规模、数据库、提交号等）与 ``scenarios``（每个场景的请求数、错误数、
+吞吐 rps、mean/p50/p95/p99 毫秒）。
+
+compare：逐场景对比 p95 与吞吐，变差超过阈值（默认 20%）的场景标记为回归，
+存在回归时以状态码 1 退出，可直接用于 CI。
+"""
+
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+SCALES = {
+    # 病人数, 病历数, 模板数
+    'small': (2000, 10000, 200),
+    'medium': (20000, 100000, 1000),
+    'large': (200000, 1000000, 5000),
+}
+DEPARTMENTS = ['内科', '外科', '妇产科', '儿科']
+SURNAMES = '王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗'
+GIVEN = '伟芳娜秀英敏静丽强磊军洋勇艳杰娟涛明超兰霞平刚桂'
+DIAGNOSES = [
+    ('发热、咳嗽、咽痛', '急性上呼吸道感染', '对症退热，多饮水，注意休息'),
+    ('腹痛、腹泻、恶心', '急性胃肠炎', '补液，口服蒙脱石散，清淡饮食'),
+    ('胸闷、心悸、气短', '心律失常', '完善心电图与动态心电监测，对因治疗'),
+    ('头痛、头晕、血压升高', '原发性高血压', '低盐饮食，口服降压药，监测血压'),
+    ('多饮、多尿、体重下降', '2型糖尿病', '控制饮食，口服降糖药，监测血糖'),
+    ('右下腹痛、发热', '急性阑尾炎', '急诊手术，术后抗感染治疗'),
+    ('外伤后踝关节肿痛', '踝关节扭伤', '制动、冰敷，必要时石膏固定'),
+    ('停经、恶心、乳房胀痛', '早期妊娠', '定期产检，补充叶酸'),
+    ('咳嗽、喘息、夜间加重', '支气管哮喘', '吸入糖皮质激素，按需使用支气管扩张剂'),
+    ('皮疹、瘙痒', '荨麻疹', '口服抗组胺药，避免接触过敏原'),
+]
+
+
+def percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def summarize(samples, errors, elapsed):
+    samples = sorted(samples)
+    return {
+        'count': len(samples),
+        'errors': errors,
+        'rps': round(len(samples) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(statistics.mean(samples), 3) if samples else None,
+        'p50_ms': round(percentile(samples, 0.50), 3) if samples else None,
+        'p95_ms': round(percentile(samples, 0.95), 3) if samples else None,
+        'p99_ms': round(percentile(samples, 0.99), 3) if samples else None,
+    }
+
+
+# --- 合成数据 ---
+
+def _name(rng):
+    return rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN) for _ in range(rng.randint(1, 2)))
+
+
+def seed(app, patients, records, templates, owner_id, rng):
+    from app import db, Patient, PatientNameGram, MedicalRecord, Template, DepartmentStat, DailyStat
+    from app import VisitRollup, DiagnosisRollup
+    from department_stats import reconcile
+    from patient_search import name_grams
+    from record_rollups import backfill
+
+    now = datetime.utcnow()
+    batch = 5000
+    with app.app_context():
+        if db.session.query(Patient.id).first() is not None:
+            print('数据库中已有病人数据，跳过生成', file=sys.stderr)
+            return
+        for start in range(0, patients, batch):
+            rows = [{
+                'id': i + 1,
+                'name': _name(rng),
+                'id_card': f'{110101198000000000 + i:018d}',
+                'age': rng.randint(1, 90),
+                'gender': rng.choice(['男', '女']),
+                'phone_number': f'1{rng.randint(3000000000, 9999999999)}',
+                'department': DEPARTMENTS[i % len(DEPARTMENTS)],
+                'created_at': now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+            } for i in range(start, min(start + batch, patients))]
+            db.session.execute(Patient.__table__.insert(), rows)
+            db.session.execute(PatientNameGram.__table__.insert(), [
+                {'gram': gram, 'patient_id': row['id']} for row in rows for gram in name_grams(row['name'])
+            ])
+        for start in range(0, records, batch):
+            rows = []
+            for _ in range(min(batch, records - start)):
+                symptom, diagnosis, plan = rng.choice(DIAGNOSES)
+                rows.append({
+                    'patient_id': rng.randint(1, patients),
+                    'record_date': now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)),
+                    'symptom': symptom,
+                    'diagnosis': diagnosis,
+                    'treatment_plan': plan,
+                })
+            db.session.execute(MedicalRecord.__table__.insert(), rows)
+        db.session.execute(Template.__table__.insert(), [{
+            'name': f'{DIAGNOSES[i % len(DIAGNOSES)][1]}模板{i}',
+            'description': '基准测试模板',
+            'content': json.dumps(dict(zip(('symptom', 'diagnosis', 'treatment_plan'), DIAGNOSES[i % len(DIAGNOSES)])),
+                                  ensure_ascii=False),
+            'owner_id': owner_id,
+            'is_shared': i % 2 == 0,
+        } for i in range(templates)])
+        db.session.commit()
+        reconcile(db.session, Patient.__table__, MedicalRecord.__table__, DepartmentStat.__table__,
+                  DailyStat.__table__)
+        backfill(db.session, Patient.__table__, MedicalRecord.__table__, VisitRollup.__table__,
+                 DiagnosisRollup.__table__)
+
+
+# --- 场景 ---
+
+class Context:
+    """场景间共享的状态：已有 id 的范围、压测中新建的对象（供修改 / 删除场景使用）。"""
+
+    def __init__(self, patients, records, templates):
+        self.patients = patients
+        self.records = records
+        self.templates = templates
+        self.created_patients = []
+        self.created_templates = []
+        self.lock = threading.Lock()
+        self.sequence = itertools.count(1)
+        self.record_patients = {}
+
+    def pop(self, name):
+        with self.lock:
+            items = getattr(self, name)
+            return items.pop() if items else None
+
+    def push(self, name, value):
+        with self.lock:
+            getattr(self, name).append(value)
+
+
+def _import_csv(ctx, rows=100):
+    buffer = io.StringIO()
+    buffer.write('name,id_card,age,gender,department\n')
+    base = 990000000000000000 + next(ctx.sequence) * rows
+    for i in range(rows):
+        buffer.write(f'导入{i},{base + i:018d},30,男,{DEPARTMENTS[i % len(DEPARTMENTS)]}\n')
+    return buffer.getvalue().encode('utf-8')
+
+
+def build_scenarios():
+    """(名称, 请求函数, 是否 AI 场景)。请求函数返回 (method, path, kwargs, 期望状态码)。"""
+    suggestion = {'symptom': '发热、咳嗽三天', 'age': 30, 'gender': '男'}
+
+    def patient_id(ctx, rng):
+        return rng.randint(1, ctx.patients)
+
+    def batch_items(rng):
+        # 查房一次提交 8 个病人，症状取自 DIAGNOSES，会有重复
+        return [{'symptom': rng.choice(DIAGNOSES)[0], 'age': 45} for _ in range(8)]
+
+    def new_patient(ctx, rng):
+        return {'name': _name(rng), 'id_card': f'{880000000000000000 + next(ctx.sequence):018d}',
+                'department': rng.choice(DEPARTMENTS)}
+
+    scenarios = [
+        ('patients.list', lambda c, r: ('GET', '/api/patients', {}, 200)),
+        ('patients.list_department', lambda c, r: ('GET', f'/api/patients?department={r.choice(DEPARTMENTS)}', {}, 200)),
+        ('patients.search_name', lambda c, r: ('GET', f'/api/patients?search={_name(r)}', {}, 200)),
+        ('patients.search_id_card', lambda c, r: ('GET', f'/api/patients?search=11010119800000{r.randint(10, 99)}', {}, 200)),
+        ('patients.list_cursor', lambda c, r: ('GET', '/api/patients?cursor=&total=none', {}, 200)),
+        ('patients.create', lambda c, r: ('POST', '/api/patients', {'json': new_patient(c, r)}, 201)),
+        ('patients.update', lambda c, r: ('PUT', f'/api/patients/{patient_id(c, r)}', {'json': {'age': r.randint(1, 90)}}, 200)),
+        ('patients.delete', lambda c, r: ('DELETE', f'/api/patients/{c.pop("created_patients")}', {}, 200)),
+        ('patients.import_csv', lambda c, r: ('POST', '/api/patients/import?format=csv', {'data': _import_csv(c)}, 200)),
+        ('export.patients_day', lambda c, r: ('GET', _export_path(r), {}, 200)),
+        ('records.list', lambda c, r: ('GET', f'/api/patients/{patient_id(c, r)}/records', {}, 200)),
+        ('records.list_fields_cursor', lambda c, r: (
+            'GET', f'/api/patients/{patient_id(c, r)}/records?cursor=&fields=id,record_date,diagnosis_summary', {}, 200)),
+        ('records.get', lambda c, r: ('GET', '/api/patients/{0}/records/{1}'.format(*_record(c, r)), {}, 200)),
+        ('records.create', lambda c, r: ('POST', f'/api/patients/{patient_id(c, r)}/records', {
+            'json': dict(zip(('symptom', 'diagnosis', 'treatment_plan'), r.choice(DIAGNOSES)))}, 201)),
+        ('records.update', lambda c, r: ('PUT', '/api/patients/{0}/records/{1}'.format(*_record(c, r)), {
+            'json': {'treatment_plan': '复诊调整方案'}}, 200)),
+        ('templates.list', lambda c, r: ('GET', '/api/templates', {}, 200)),
+        ('templates.get', lambda c, r: ('GET', f'/api/templates/{r.randint(1, c.templates)}', {}, 200)),
+        ('templates.create', lambda c, r: ('POST', '/api/templates', {'json': {
+            'name': f'新模板{next(c.sequence)}', 'content': dict(zip(('symptom', 'diagnosis', 'treatment_plan'),
+                                                                   r.choice(DIAGNOSES)))}}, 201)),
+        ('templates.update', lambda c, r: ('PUT', f'/api/templates/{r.randint(1, c.templates)}', {
+            'json': {'description': f'更新{next(c.sequence)}'}}, 200)),
+        ('templates.delete', lambda c, r: ('DELETE', f'/api/templates/{c.pop("created_templates")}', {}, 200)),
+        ('templates.save_from_record', lambda c, r: (
+            'POST', '/api/patients/{0}/records/{1}/save_as_template'.format(*_record(c, r)), {'json': {}}, 201)),
+        ('records.create_from_template', lambda c, r: (
+            'POST', f'/api/patients/{patient_id(c, r)}/records/from_template/{r.randint(1, c.templates)}', {'json': {}}, 201)),
+        ('stats.departments', lambda c, r: ('GET', '/api/departments/stats', {}, 200)),
+        ('stats.departments_detail', lambda c, r: ('GET', '/api/departments/stats?detail=1', {}, 200)),
+        ('stats.daily', lambda c, r: ('GET', '/api/stats/daily?days=30', {}, 200)),
+        ('analytics.visits_week', lambda c, r: ('GET', '/api/analytics/visits?interval=week', {}, 200)),
+        ('analytics.diagnoses_month', lambda c, r: ('GET', '/api/analytics/diagnoses?interval=month', {}, 200)),
+        ('db.pool_stats', lambda c, r: ('GET', '/api/db/pool/stats', {}, 200)),
+        ('ai.cache_stats', lambda c, r: ('GET', '/api/ai/cache/stats', {}, 200)),
+    ]
+    ai_scenarios = [
+        ('ai.suggestion', lambda c, r: ('POST', '/api/ai/generate_record_suggestion', {
+            'json': dict(suggestion, no_cache=True)}, 200)),
+        ('ai.suggestion_cached', lambda c, r: ('POST', '/api/ai/generate_record_suggestion', {'json': suggestion}, 200)),
+        ('ai.suggestion_stream', lambda c, r: ('POST', '/api/ai/generate_record_suggestion/stream', {
+            'json': dict(suggestion, no_cache=True)}, 200)),
+        ('ai.suggestion_async', lambda c, r: ('POST', '/api/ai/generate_record_suggestion?async=1', {
+            'json': dict(suggestion, no_cache=True)}, 202)),
+        ('ai.suggestion_batch', lambda c, r: ('POST', '/api/ai/generate_record_suggestion/batch', {
+            'json': {'items': batch_items(r), 'no_cache': True}}, 200)),
+        ('ai.suggest_templates', lambda c, r: ('POST', '/api/ai/suggest_templates', {
+            'json': {'symptom': r.choice(DIAGNOSES)[0]}}, 200)),
+    ]
+    return [(name, factory, False) for name, factory in scenarios] + \
+           [(name, factory, True) for name, factory in ai_scenarios]
+
+
+def _export_path(rng):
+    # 导出随机一天新增的病人
+    day = (datetime.utcnow() - timedelta(days=rng.randint(0, 364))).strftime('%Y-%m-%d')
+    return f'/api/export/patients?format=csv&start={day}&end={day}'
+
+
+def _record(ctx, rng):
+    """随机取一条已有病历，返回 (patient_id, record_id)。"""
+    record_id = rng.randint(1, ctx.records)
+    patient = ctx.record_patients.get(record_id)
+    if patient is None:
+        from app import MedicalRecord
+        patient = MedicalRecord.query.with_entities(MedicalRecord.patient_id).filter_by(id=record_id).scalar()
+        ctx.record_patients[record_id] = patient
+    return patient, record_id
+
+
+def _after(name, ctx, response):
+    # 记录新建对象，供删除场景使用
+    if name == 'patients.create':
+        ctx.push('created_patients', response.get_json()['id'])
+    elif name in ('templates.create', 'templates.save_from_record'):
+        ctx.push('created_templates', response.get_json()['id'])
+    return response
+
+
+def run_scenario(app, headers, ctx, name, factory, requests, concurrency):
+    samples, errors = [], []
+    counter = itertools.count()
+
+    def worker(seed_value):
+        rng = random.Random(seed_value)
+        client = app.test_client()
+        while next(counter) < requests:
+            with app.app_context():
+                method, path, kwargs, expected = factory(ctx, rng)
+            begin = time.perf_counter()
+            response = client.open(path, method=method, headers=headers, **kwargs)
+            body = response.get_data()
+            if response.status_code == 202:
+                # 异步任务：长轮询到完成，计入端到端耗时
+                job_id = json.loads(body)['job_id']
+                response = client.get(f'/api/ai/jobs/{job_id}?wait=30', headers=headers)
+                expected = 200
+            elapsed = (time.perf_counter() - begin) * 1000
+            if response.status_code != expected:
+                errors.append(f'{method} {path} -> {response.status_code}')
+                continue
+            samples.append(elapsed)
+            _after(name, ctx, response)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    begin = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    result = summarize(samples, len(errors), time.perf_counter() - begin)
+    if errors:
+        result['error_samples'] = sorted(set(errors))[:5]
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def command_run(args):
+    patients, records, templates = SCALES[args.scale]
+    patients = args.patients or patients
+    records = args.records or records
+    templates = args.templates or templates
+
+    from fake_llm_server import start_fake_llm_server
+    server, base_url = start_fake_llm_server(latency=args.llm_latency)
+    os.environ['LLM_BASE_URL'] = base_url
+    os.environ['LLM_API_KEY'] = 'sk-fake'
+    os.environ.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+    from app import create_app, db, ai_jobs, User
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        client = app.test_client()
+        client.post('/api/register', json={'username': 'bench', 'password': 'bench'})
+        login = client.post('/api/login', json={'username': 'bench', 'password': 'bench'}).get_json()
+        owner_id = User.query.filter_by(username='bench').first().id
+        dialect = db.engine.dialect.name
+    headers = {'Authorization': f"Bearer {login['access_token']}"}
+
+    begin = time.perf_counter()
+    seed(app, patients, records, templates, owner_id, random.Random(args.seed))
+    seed_seconds = time.perf_counter() - begin
+
+    ctx = Context(patients, records, templates)
+    selected = [s for s in build_scenarios() if not args.only or any(s[0].startswith(p) for p in args.only)]
+    results = {}
+    for name, factory, is_ai in selected:
+        count = args.ai_requests if is_ai else args.requests
+        results[name] = run_scenario(app, headers, ctx, name, factory, count, args.concurrency)
+        summary = results[name]
+        print(f"{name:<32} rps {summary['rps'] or 0:>9.1f}  p50 {summary['p50_ms'] or 0:>8.2f}ms  "
+              f"p95 {summary['p95_ms'] or 0:>8.2f}ms  p99 {summary['p99_ms'] or 0:>8.2f}ms  "
+              f"errors {summary['errors']}", file=sys.stderr)
+
+    ai_jobs.shutdown(wait=True)
+    server.shutdown()
+    report = {
+        'meta': {
+            'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'database': dialect,
+            'scale': {'patients': patients, 'records': records, 'templates': templates},
+            'seed_seconds': round(seed_seconds, 1),
+            'requests': args.requests,
+            'ai_requests': args.ai_requests,
+            'concurrency': args.concurrency,
+            'llm_latency': args.llm_latency,
+        },
+        'scenarios': results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fp:
+            fp.write(output)
+    else:
+        print(output)
+
+
+def compare(base, new, threshold):
+    """逐场景对比，返回 (行, 是否存在回归)。p95 变慢或吞吐下降超过阈值视为回归。"""
+    rows = []
+    regressed = False
+    for name in sorted(set(base['scenarios']) | set(new['scenarios'])):
+        old, cur = base['scenarios'].get(name), new['scenarios'].get(name)
+        if not old or not cur or not old['count'] or not cur['count']:
+            rows.append((name, None, None, None, None, '缺少数据'))
+            continue
+        p95_change = cur['p95_ms'] / old['p95_ms'] - 1 if old['p95_ms'] else 0.0
+        rps_change = cur['rps'] / old['rps'] - 1 if old['rps'] else 0.0
+        status = 'ok'
+        if p95_change > threshold or rps_change < -threshold or cur['errors'] > old['errors']:
+            status = 'REGRESSION'
+            regressed = True
+        elif p95_change < -threshold:
+            status = 'faster'
+        rows.append((name, old['p95_ms'], cur['p95_ms'], p95_change, rps_change, status))
+    return rows, regressed
+
+
+def command_compare(args):
+    with open(args.base, encoding='utf-8') as fp:
+        base = json.load(fp)
+    with open(args.new, encoding='utf-8') as fp:
+        new = json.load(fp)
+    if base['meta'].get('scale') != new['meta'].get('scale'):
+        print('警告：两次运行的数据规模不同', file=sys.stderr)
+
+    rows, regressed = compare(base, new, args.threshold)
+    print(f"{'scenario':<32} {'p95 base':>10} {'p95 new':>10} {'p95 Δ':>8} {'rps Δ':>8}  status")
+    for name, old_p95, new_p95, p95_change, rps_change, status in rows:
+        if old_p95 is None:
+            print(f'{name:<32} {"":>10} {"":>10} {"":>8} {"":>8}  {status}')
+            continue
+        print(f'{name:<32} {old_p95:>8.2f}ms {new_p95:>8.2f}ms {p95_change:>+7.1%} {rps_change:>+7.1%}  {status}')
+    sys.exit(1 if regressed else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='生成数据并压测全部接口')
+    run.add_argument('--scale', choices=sorted(SCALES), default='small')
+    run.add_argument('--patients', type=int, help='覆盖 --scale 的病人数')
+    run.add_argument('--records', type=int, help='覆盖 --scale 的病历数')
+    run.add_argument('--templates', type=int, help='覆盖 --scale 的模板数')
+    run.add_argument('--requests', type=int, default=200, help='每个场景的请求数')
+    run.add_argument('--ai-requests', type=int, default=20, help='每个 AI 场景的请求数')
+    run.add_argument('--concurrency', type=int, default=4)
+    run.add_argument('--llm-latency', type=float, default=0.05, help='假大模型每次调用的延迟（秒）')
+    run.add_argument('--only', nargs='*', help='只运行名称以这些前缀开头的场景，如 patients. ai.')
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('-o', '--output', help='报告输出文件，缺省输出到标准输出')
+    run.set_defaults(func=command_run)
+
+    cmp_parser = sub.add_parser('compare', help='对比两次运行结果')
+    cmp_parser.add_argument('base')
+    cmp_parser.add_argument('new')
+    cmp_parser.add_argument('--threshold', type=float, default=0.2, help='p95 / 吞吐的回归阈值（比例）')
+    cmp_parser.set_defaults(func=command_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""病人 CRUD 压测：对比开发服务器（python app.py）与生产模式（gunicorn / waitress）。
+
+用法（在 backend 目录下）：
+
+    python benchmarks/load_test.py dev          # Werkzeug 开发服务器，debug=True
+    python benchmarks/load_test.py gunicorn     # gunicorn -c gunicorn.conf.py wsgi:app
+    python benchmarks/load_test.py waitress     # python wsgi.py
+    python benchmarks/load_test.py gunicorn --concurrency 32 --duration 30
+
+压测剖面（每个客户端线程循环执行，保持长连接）：
+
+    60% GET  /api/patients?per_page=20&total=none   列表第一页
+    15% GET  /api/patients/<id>/records            单个病人的病历
+    15% POST /api/patients                         新增病人
+     5% PUT  /api/patients/<id>                    修改病人
+     5% DELETE /api/patients/<id>                  删除本线程新增的病人
+
+``--profile ai-jobs``：启动假大模型（--llm-latency 秒延迟），每个客户端线程循环
+提交 AI 异步任务（POST /api/ai/generate_record_suggestion?async=1），再用长轮询
+GET /api/ai/jobs/<id>?wait=5 等到任务完成。每次轮询都新建连接，由 gunicorn 的
+多个进程分别接收，验证任务状态在进程间共享（轮询返回 404 计为错误）。延迟为
+提交到拿到结果的时间。
+
+    python benchmarks/load_test.py gunicorn --profile ai-jobs --workers 3 --concurrency 8
+
+默认使用临时 SQLite 文件库（多进程并发写入会互相等待锁，写入吞吐以 MySQL 为准），
+可通过 SQLALCHEMY_DATABASE_URI 指向 MySQL 测试库。输出每秒请求数、p50/p95/p99
+延迟与错误数。
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+SEED_PATIENTS = 2000
+
+
+def _server_command(mode, port):
+    if mode == 'dev':
+        # 与 python app.py 相同（debug=True），关闭重载器以便压测结束后终止进程
+        code = ('from app import create_app; '
+                f"create_app().run(debug=True, use_reloader=False, port={port})")
+        return [sys.executable, '-c', code]
+    if mode == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+    return [sys.executable, 'wsgi.py']
+
+
+def _prepare_database(env):
+    # 生产入口不建表，压测前先建表并写入种子数据
+    code = f"""
+from app import create_app, db, Patient
+app = create_app()
+with app.app_context():
+    db.create_all()
+    db.session.execute(Patient.__table__.insert(), [
+        {{'name': f'病人{{i}}', 'id_card': f'{{220101199000000000 + i:018d}}', 'department': '内科'}}
+        for i in range({SEED_PATIENTS})
+    ])
+    db.session.commit()
+"""
+    subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env, check=True)
+
+
+def _wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('服务未能在规定时间内启动')
+
+
+class Client:
+    def __init__(self, port, token):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        self.headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+
+    def request(self, method, path, body=None):
+        payload = json.dumps(body) if body is not None else None
+        try:
+            self.connection.request(method, path, body=payload, headers=self.headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            self.connection.close()
+            return 599, b''
+        return response.status, data
+
+
+def _worker(port, token, deadline, worker_id, samples, errors):
+    client = Client(port, token)
+    rng = random.Random(worker_id)
+    created = []
+    sequence = 0
+    while time.time() < deadline:
+        roll = rng.random()
+        if roll < 0.60:
+            args = ('GET', '/api/patients?per_page=20&total=none')
+        elif roll < 0.75:
+            args = ('GET', f'/api/patients/{rng.randint(1, SEED_PATIENTS)}/records')
+        elif roll < 0.90 or not created:
+            sequence += 1
+            id_card = f'{worker_id:06d}{sequence:012d}'
+            args = ('POST', '/api/patients', {'name': f'压测{worker_id}', 'id_card': id_card, 'department': '外科'})
+        elif roll < 0.95:
+            args = ('PUT', f'/api/patients/{rng.choice(created)}', {'age': rng.randint(1, 90)})
+        else:
+            args = ('DELETE', f'/api/patients/{created.pop()}')
+
+        begin = time.perf_counter()
+        status, data = client.request(*args)
+        samples.append((time.perf_counter() - begin) * 1000)
+        if status >= 400:
+            errors.append(status)
+        elif args[0] == 'POST':
+            created.append(json.loads(data)['id'])
+
+
+def _ai_job_worker(port, token, deadline, worker_id, samples, errors):
+    sequence = 0
+    while time.time() < deadline:
+        sequence += 1
+        begin = time.perf_counter()
+        status, data = Client(port, token).request(
+            'POST', '/api/ai/generate_record_suggestion?async=1',
+            {'symptom': f'发热 {worker_id}-{sequence}', 'no_cache': True},
+        )
+        if status != 202:
+            errors.append(status)
+            continue
+        job_id = json.loads(data)['job_id']
+        while True:
+            # 每次轮询新建连接，可能由任意一个 worker 进程接收
+            status, data = Client(port, token).request('GET', f'/api/ai/jobs/{job_id}?wait=5')
+            if status != 200:
+                errors.append(status)
+                break
+            job = json.loads(data)
+            if job['status'] == 'succeeded':
+                samples.append((time.perf_counter() - begin) * 1000)
+                break
+            if job['status'] == 'failed':
+                errors.append(job['status'])
+                break
+
+
+PROFILES = {'crud': _worker, 'ai-jobs': _ai_job_worker}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('mode', choices=('dev', 'gunicorn', 'waitress'))
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='crud')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--workers', type=int, default=0, help='gunicorn 进程数（WEB_WORKERS），0 为默认值')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='ai-jobs 剖面中假大模型的延迟（秒）')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}")
+    env['WEB_BIND'] = f'127.0.0.1:{args.port}'
+    if args.workers:
+        env['WEB_WORKERS'] = str(args.workers)
+    llm_server = None
+    if args.profile == 'ai-jobs':
+        from fake_llm_server import start_fake_llm_server
+
+        llm_server, env['LLM_BASE_URL'] = start_fake_llm_server(latency=args.llm_latency)
+        env.setdefault('LLM_API_KEY', 'sk-fake')
+    _prepare_database(env)
+
+    server = subprocess.Popen(_server_command(args.mode, args.port), cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_for_port(args.port)
+        setup = Client(args.port, '')
+        setup.request('POST', '/api/register', {'username': 'load', 'password': 'load'})
+        _, body = setup.request('POST', '/api/login', {'username': 'load', 'password': 'load'})
+        token = json.loads(body)['access_token']
+
+        samples, errors = [], []
+        deadline = time.time() + args.duration
+        threads = [
+            threading.Thread(target=PROFILES[args.profile], args=(args.port, token, deadline, i, samples, errors))
+            for i in range(args.concurrency)
+        ]
+        begin = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - begin
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+        if llm_server is not None:
+            llm_server.shutdown()
+
+    samples.sort()
+    print(json.dumps({
+        'mode': args.mode,
+        'profile': args.profile,
+        'workers': args.workers or None,
+        'concurrency': args.concurrency,
+        'requests': len(samples),
+        'rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(statistics.median(samples), 2),
+        'p95_ms': round(samples[int(len(samples) * 0.95)], 2),
+        'p99_ms': round(samples[int(len(samples) * 0.99)], 2),
+        'errors': len(errors),
+    }, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""数据库连接池：按配置生成引擎参数、统计取连接等待时间、GET 请求读写分离。
+
+- 每个进程各有一个连接池。pool_size 默认等于进程的线程数（WEB_THREADS），
+  每个线程同一时刻最多占用一个连接；全部进程的连接总数
+  ``进程数 × (pool_size + max_overflow)`` 应小于 MySQL 的 max_connections。
+- ``pool_pre_ping`` 在取出连接时先检测连接是否可用，``pool_recycle`` 定期重建
+  长期空闲的连接，避免 MySQL 断开空闲连接后出现 “MySQL server has gone away”。
+- ``InstrumentedQueuePool`` 记录每次取连接的等待时间、超时次数，供
+  ``/api/db/pool/stats`` 查看连接池是否不够用。
+- 配置了只读副本时，``RoutingSession`` 把 GET 请求中的查询路由到副本，写入与
+  刷新（flush）始终走主库。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Dict
+
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+REPLICA_BIND = 'replica'
+
+
+class PoolMetrics:
+    """取连接等待时间的累计统计（线程安全，进程内）。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """记录取连接等待时间的 QueuePool。"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        begin = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.metrics.record(time.perf_counter() - begin, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - begin)
+        return connection
+
+
+def engine_options(uri: str, pool_size: int, max_overflow: int, pool_timeout: float, pool_recycle: int,
+                   pre_ping: bool) -> Dict:
+    """生成 create_engine 参数。SQLite 内存库由 Flask-SQLAlchemy 使用 StaticPool，不设置连接池参数。"""
+    options: Dict = {'pool_pre_ping': pre_ping}
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+    )
+    return options
+
+
+def pool_status(engine) -> Dict:
+    pool = engine.pool
+    status = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        status.update(pool.metrics.snapshot())
+    return status
+
+
+class RoutingSession(Session):
+    """GET 请求中的 SELECT 路由到只读副本；flush 与其它语句仍走主库。"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and (clause is None or isinstance(clause, Select))
+            and has_request_context()
+            and request.method == 'GET'
+        ):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
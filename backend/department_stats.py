@@ -0,0 +1,190 @@
+"""科室统计计数表：写入时增量维护，定期全量对账。
+
+统计接口原来每次都对整张 patients 表执行 ``GROUP BY department``。这里维护两张
+小表：
+
+- ``department_stats``：每个科室的病人数与病历数（病历按病人当前所在科室归属）；
+- ``daily_stats``：每天新增的病人数与病历数（按 created_at / record_date 的日期）。
+
+计数由 Patient / MedicalRecord 的写入事件在同一事务中更新（批量导入直接调用
+``increment``），统计接口只读这两张小表。计数行通过数据库的 upsert 原子累加，
+并发写入不会丢失更新。异常路径（手工改库、事件之外的批量 SQL）造成的偏差由
+``reconcile`` 按原表重新聚合后修正。
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import func, select
+
+
+class CounterDeltas:
+    """一次写入产生的计数变化，按计数行汇总后再落库，减少语句数。"""
+
+    def __init__(self):
+        self.departments: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.days: Dict[date, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def department(self, department: str, **deltas: int) -> None:
+        for column, delta in deltas.items():
+            self.departments[department][column] += delta
+
+    def day(self, when, **deltas: int) -> None:
+        if when is None:
+            return
+        day = when.date() if isinstance(when, datetime) else when
+        for column, delta in deltas.items():
+            self.days[day][column] += delta
+
+    def apply(self, connection, department_table, daily_table) -> None:
+        # 按键排序后落库：并发事务总以相同顺序锁行（如相反方向的两次转科），避免死锁
+        for department, deltas in sorted(self.departments.items()):
+            increment(connection, department_table, {'department': department}, deltas)
+        for day, deltas in sorted(self.days.items()):
+            increment(connection, daily_table, {'day': day}, deltas)
+
+
+def increment(connection, table, key: Mapping, deltas: Mapping[str, int]) -> None:
+    """原子地累加一行计数，行不存在时插入。"""
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    values = {**key, **deltas}
+    dialect = connection.dialect.name
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(values)
+        stmt = stmt.on_duplicate_key_update({column: table.c[column] + stmt.inserted[column] for column in deltas})
+    elif dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={column: table.c[column] + stmt.excluded[column] for column in deltas},
+        )
+    else:
+        condition = [table.c[column] == value for column, value in key.items()]
+        updated = connection.execute(
+            table.update().where(*condition).values({column: table.c[column] + delta for column, delta in deltas.items()})
+        )
+        if updated.rowcount:
+            return
+        stmt = table.insert().values(values)
+    connection.execute(stmt)
+
+
+def read_department_stats(session, department_table, departments: Iterable[str]) -> Dict[str, Dict[str, int]]:
+    """各科室的病人数与病历数，缺失的科室补 0。"""
+    result = {department: {'patient_count': 0, 'record_count': 0} for department in departments}
+    rows = session.execute(select(
+        department_table.c.department, department_table.c.patient_count, department_table.c.record_count
+    ))
+    for department, patient_count, record_count in rows:
+        result[department] = {'patient_count': patient_count, 'record_count': record_count}
+    return result
+
+
+def read_daily_stats(session, daily_table, days: int, today: Optional[date] = None) -> List[Dict]:
+    """最近 days 天（含今天）每天的新增病人数与病历数，没有数据的日期补 0。"""
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+    rows = session.execute(
+        select(daily_table.c.day, daily_table.c.new_patients, daily_table.c.new_records)
+        .where(daily_table.c.day >= start, daily_table.c.day <= today)
+    )
+    by_day = {as_date(day): (new_patients, new_records) for day, new_patients, new_records in rows}
+    result = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        new_patients, new_records = by_day.get(day, (0, 0))
+        result.append({'day': day.isoformat(), 'new_patients': new_patients, 'new_records': new_records})
+    return result
+
+
+def as_date(value) -> date:
+    # SQLite 的 DATE() 返回字符串
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _actual_counts(session, patient_table, record_table) -> Tuple[Dict, Dict]:
+    departments: Dict[str, Dict[str, int]] = defaultdict(lambda: {'patient_count': 0, 'record_count': 0})
+    days: Dict[date, Dict[str, int]] = defaultdict(lambda: {'new_patients': 0, 'new_records': 0})
+
+    for department, count in session.execute(
+        select(patient_table.c.department, func.count()).group_by(patient_table.c.department)
+    ):
+        departments[department]['patient_count'] = count
+    for department, count in session.execute(
+        select(patient_table.c.department, func.count())
+        .select_from(record_table.join(patient_table, patient_table.c.id == record_table.c.patient_id))
+        .group_by(patient_table.c.department)
+    ):
+        departments[department]['record_count'] = count
+
+    patient_day = func.date(patient_table.c.created_at)
+    for day, count in session.execute(
+        select(patient_day, func.count()).where(patient_table.c.created_at.isnot(None)).group_by(patient_day)
+    ):
+        days[as_date(day)]['new_patients'] = count
+    record_day = func.date(record_table.c.record_date)
+    for day, count in session.execute(select(record_day, func.count()).group_by(record_day)):
+        days[as_date(day)]['new_records'] = count
+    return departments, days
+
+
+def reconcile(session, patient_table, record_table, department_table, daily_table) -> List[Dict]:
+    """按原表重新聚合并修正计数表，返回被修正的行（无偏差时为空列表）。
+
+    需要扫描 patients 与 medical_records 全表，应在低峰期由定时任务执行。
+    对账期间的并发写入可能造成新的微小偏差，会在下一次对账时修正。
+    """
+    actual_departments, actual_days = _actual_counts(session, patient_table, record_table)
+    corrections: List[Dict] = []
+
+    stored_departments = {
+        row.department: {'patient_count': row.patient_count, 'record_count': row.record_count}
+        for row in session.execute(select(department_table))
+    }
+    for department in set(stored_departments) | set(actual_departments):
+        expected = actual_departments.get(department, {'patient_count': 0, 'record_count': 0})
+        stored = stored_departments.get(department)
+        if stored == expected:
+            continue
+        corrections.append({'table': department_table.name, 'key': department, 'stored': stored, 'actual': expected})
+        if stored is None:
+            session.execute(department_table.insert().values(department=department, **expected))
+        else:
+            session.execute(
+                department_table.update().where(department_table.c.department == department).values(**expected)
+            )
+
+    stored_days = {
+        as_date(row.day): {'new_patients': row.new_patients, 'new_records': row.new_records}
+        for row in session.execute(select(daily_table))
+    }
+    for day in set(stored_days) | set(actual_days):
+        expected = actual_days.get(day)
+        stored = stored_days.get(day)
+        if stored == expected:
+            continue
+        corrections.append({'table': daily_table.name, 'key': day.isoformat(), 'stored': stored, 'actual': expected})
+        if expected is None:
+            session.execute(daily_table.delete().where(daily_table.c.day == day))
+        elif stored is None:
+            session.execute(daily_table.insert().values(day=day, **expected))
+        else:
+            session.execute(daily_table.update().where(daily_table.c.day == day).values(**expected))
+
+    session.commit()
+    return corrections
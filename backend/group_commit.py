@@ -0,0 +1,178 @@
+"""组提交（group commit）：把并发请求的插入合并到一个事务中提交。
+
+门诊高峰时大量请求各自插入一行并提交，提交（落盘）耗时成为瓶颈。开启
+``GROUP_COMMIT_ENABLED`` 后，新增病历 / 模板的请求把插入交给进程内唯一的提交
+线程：第一条插入到达后再等待至多 window 秒（或攒满 max_batch 条），在同一个
+事务中执行全部插入并只提交一次，然后分别通知各请求。
+
+每个请求的成功 / 失败语义保持不变：整批提交失败时回滚，再把每条插入单独放在
+各自的事务中重试，只有真正出错的那条返回失败。因此插入由 ``build(session)``
+在提交线程中构造（重试时需要重新构造对象），提交后在同一会话中调用
+``finish(obj)`` 生成响应数据。
+
+请求最多等待 timeout 秒：超时时尚未开始执行的插入被取消（未写入，可重试），
+已经在执行的插入结果未知。两种情况都抛出 ``GroupCommitTimeout``。
+
+提交线程延迟启动，避免在 fork 之前创建线程。
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+_STOP = object()
+
+Build = Callable[[Session], Any]
+Finish = Callable[[Any], Any]
+
+
+class GroupCommitTimeout(RuntimeError):
+    """等待组提交超时；cancelled 为 True 时插入已取消、未写入。"""
+
+    def __init__(self, message: str, cancelled: bool):
+        super().__init__(message)
+        self.cancelled = cancelled
+
+
+class GroupCommitter:
+    """单线程组提交器；session_factory 在应用上下文中调用，返回新的会话。"""
+
+    def __init__(self, app, session_factory: Callable[[], Session], window_seconds: float = 0.005,
+                 max_batch: int = 64, timeout_seconds: float = 10.0):
+        self.app = app
+        self.session_factory = session_factory
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self.timeout_seconds = timeout_seconds
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.retried_batches = 0
+
+    def submit(self, build: Build, finish: Finish) -> Future:
+        """提交一条插入，返回 Future，结果为 finish(obj) 的返回值或插入 / 提交时的异常。"""
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((build, finish, future))
+        return future
+
+    def wait(self, future: Future) -> Any:
+        """等待 submit 返回的 Future，最多 timeout_seconds 秒。"""
+        try:
+            return future.result(self.timeout_seconds)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise GroupCommitTimeout('数据库繁忙，保存已取消，请稍后重试', cancelled=True) from None
+            raise GroupCommitTimeout('保存超时，结果未知，请刷新后确认', cancelled=False) from None
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='group-commit', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = self._collect(batch)
+            # 等待超时、已被请求取消的插入不再执行
+            batch = [entry for entry in batch if entry[2].set_running_or_notify_cancel()]
+            if not batch:
+                if stop:
+                    return
+                continue
+            try:
+                with self.app.app_context():
+                    self._commit_batch(batch)
+            except BaseException as exc:  # pragma: no cover - 应用上下文本身出错
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            if stop:
+                return
+
+    def _collect(self, batch: List[Tuple]) -> bool:
+        """在时间窗口内继续收集插入，返回是否收到停止信号。"""
+        deadline = time.monotonic() + self.window_seconds
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                return False
+            if item is _STOP:
+                return True
+            batch.append(item)
+        return False
+
+    def _commit_batch(self, batch: List[Tuple]) -> None:
+        session = self.session_factory()
+        try:
+            try:
+                objects = [build(session) for build, _, _ in batch]
+                session.commit()
+            except Exception:
+                session.rollback()
+                self.retried_batches += 1
+                # 整批失败：逐条单独提交，只让出错的那条失败
+                for item in batch:
+                    self._commit_one(session, item)
+                return
+            self.batches += 1
+            self.items += len(batch)
+            for obj, (_, finish, future) in zip(objects, batch):
+                self._finish(future, finish, obj)
+        finally:
+            session.close()
+
+    def _commit_one(self, session: Session, item: Tuple) -> None:
+        build, finish, future = item
+        try:
+            obj = build(session)
+            session.commit()
+        except Exception as exc:
+            session.rollback()
+            future.set_exception(exc)
+            return
+        self.batches += 1
+        self.items += 1
+        self._finish(future, finish, obj)
+
+    @staticmethod
+    def _finish(future: Future, finish: Finish, obj: Any) -> None:
+        try:
+            future.set_result(finish(obj))
+        except Exception as exc:
+            future.set_exception(exc)
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch_size': round(self.items / self.batches, 2) if self.batches else 0.0,
+            'retried_batches': self.retried_batches,
+            'queued': self._queue.qsize(),
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """处理完已提交的插入后停止提交线程。"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        if wait:
+            thread.join()
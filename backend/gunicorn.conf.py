@@ -0,0 +1,44 @@
+"""gunicorn 配置：gthread 多进程 + 多线程。
+
+- 进程数默认 ``2 * CPU 核数 + 1``（上限 8），可用 WEB_WORKERS 覆盖；
+- 每个进程 WEB_THREADS 个线程，大模型调用等待期间其它请求不受影响；
+- 每个进程各自持有数据库连接池，连接池大小应不小于线程数；
+- 收到 SIGTERM 后停止接收新请求，进行中的请求最多等待 WEB_GRACEFUL_TIMEOUT 秒，
+  随后在 worker_exit 中等待 AI 异步任务结束并关闭数据库连接；
+- 轮询 AI 异步任务的请求可能落在任意进程上，多进程时任务状态必须存共享存储
+  （AI_JOB_STORE=database），AI_JOB_STORE=memory 时拒绝以多进程启动。
+"""
+
+import multiprocessing
+
+from config import (
+    AI_JOB_STORE, DB_MAX_OVERFLOW, DB_POOL_SIZE, WEB_BIND, WEB_GRACEFUL_TIMEOUT, WEB_MAX_REQUESTS, WEB_THREADS,
+    WEB_TIMEOUT, WEB_WORKERS,
+)
+
+bind = WEB_BIND
+workers = WEB_WORKERS or min(2 * multiprocessing.cpu_count() + 1, 8)
+if workers > 1 and AI_JOB_STORE == 'memory':
+    raise SystemExit('AI_JOB_STORE=memory 时任务状态只在单个进程内，轮询会落到其它进程返回 404；'
+                     '请使用 AI_JOB_STORE=database 或设置 WEB_WORKERS=1')
+worker_class = 'gthread'
+threads = WEB_THREADS
+timeout = WEB_TIMEOUT
+graceful_timeout = WEB_GRACEFUL_TIMEOUT
+keepalive = 5
+max_requests = WEB_MAX_REQUESTS
+max_requests_jitter = WEB_MAX_REQUESTS // 10
+# 不预加载应用：每个进程在 fork 之后各自创建数据库连接池与大模型客户端
+preload_app = False
+accesslog = '-'
+
+
+def when_ready(server):
+    per_worker = (DB_POOL_SIZE or threads) + DB_MAX_OVERFLOW
+    server.log.info('数据库连接上限：%d 进程 × %d = %d（需小于 MySQL max_connections）',
+                    workers, per_worker, workers * per_worker)
+
+
+def worker_exit(server, worker):
+    from wsgi import shutdown
+    shutdown()
@@ -0,0 +1,50 @@
+"""当前用户解析：优先使用 JWT 声明，其次查进程内 TTL 缓存，最后才查 users 表。
+
+登录时把用户 id 写入 JWT 的附加声明（``uid``），模板与 AI 等受保护接口
+只需要用户 id，因此绝大多数请求完全不访问 users 表。旧版本签发的 token
+没有 ``uid`` 声明，按用户名查库后结果缓存一段时间；用户变更时使缓存失效。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+
+class CurrentUser(NamedTuple):
+    id: int
+    username: str
+
+
+class UserIdentityCache:
+    """用户名 -> CurrentUser 的 TTL 缓存（线程安全），不缓存未找到的结果。"""
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 4096):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, CurrentUser]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_load(self, username: str, load: Callable[[str], Optional[CurrentUser]]) -> Optional[CurrentUser]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        user = load(username)
+        if user is not None:
+            with self._lock:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+                self._entries[username] = (now + self.ttl_seconds, user)
+        return user
+
+    def invalidate(self, username: Optional[str]) -> None:
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
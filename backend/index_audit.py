@@ -0,0 +1,85 @@
+"""索引审计：对各接口的典型查询执行 EXPLAIN，找出全表扫描与额外排序。
+
+支持 MySQL（`EXPLAIN`）与 SQLite（`EXPLAIN QUERY PLAN`）。判定规则：
+
+- 全表扫描（MySQL type=ALL；SQLite `SCAN 表名` 且未使用索引）记为 error；
+- 额外排序（MySQL `Using filesort`；SQLite `USE TEMP B-TREE`）记为 warning。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+@dataclass
+class AuditResult:
+    name: str
+    sql: str
+    plan: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def _compile(statement, dialect):
+    compiled = statement.compile(dialect=dialect, compile_kwargs={'render_postcompile': True})
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+    return str(compiled), params
+
+
+def _explain_mysql(connection, sql, params, result: AuditResult) -> None:
+    rows = connection.exec_driver_sql(f'EXPLAIN {sql}', params).mappings().all()
+    for row in rows:
+        table = row.get('table')
+        access = row.get('type')
+        extra = row.get('Extra') or ''
+        result.plan.append(f"table={table} type={access} key={row.get('key')} rows={row.get('rows')} extra={extra}")
+        if access == 'ALL':
+            result.errors.append(f'{table}: 全表扫描')
+        if 'Using filesort' in extra:
+            result.warnings.append(f'{table}: 使用 filesort 排序')
+
+
+def _explain_sqlite(connection, sql, params, result: AuditResult) -> None:
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', params).all()
+    for row in rows:
+        detail = row[-1]
+        result.plan.append(detail)
+        if detail.startswith('SCAN ') and 'INDEX' not in detail and 'SUBQUERY' not in detail:
+            result.errors.append(f'全表扫描：{detail}')
+        if 'USE TEMP B-TREE' in detail:
+            result.warnings.append(f'额外排序：{detail}')
+
+
+def audit_queries(session, queries: Dict[str, object]) -> List[AuditResult]:
+    """对 {名称: Query/Select} 逐个执行 EXPLAIN 并返回审计结果。"""
+    connection = session.connection()
+    dialect = connection.dialect
+    explain = _explain_mysql if dialect.name == 'mysql' else _explain_sqlite
+
+    results = []
+    for name, query in queries.items():
+        statement = getattr(query, 'statement', query)
+        sql, params = _compile(statement, dialect)
+        result = AuditResult(name=name, sql=sql)
+        explain(connection, sql, params, result)
+        results.append(result)
+    return results
+
+
+def format_results(results: List[AuditResult]) -> str:
+    lines = []
+    for result in results:
+        status = 'FAIL' if result.errors else ('WARN' if result.warnings else 'OK')
+        lines.append(f'[{status}] {result.name}')
+        lines.extend(f'    plan: {step}' for step in result.plan)
+        lines.extend(f'    error: {message}' for message in result.errors)
+        lines.extend(f'    warning: {message}' for message in result.warnings)
+    return '\n'.join(lines)
@@ -0,0 +1,76 @@
+"""可替换的 JSON 实现：安装了 orjson 时用它序列化响应，否则使用标准库。
+
+orjson 是 C 扩展，序列化列表接口的大响应时比标准库 ``json`` 快数倍。输出与
+Flask 默认实现保持一致：
+
+- 键排序沿用 ``sort_keys``（Flask 默认开启）；
+- datetime / date / UUID / dataclass 等交给 Flask 的 ``default`` 处理（datetime
+  仍输出 HTTP 日期格式，而不是 orjson 的 ISO 8601）；
+- 区别仅在于非 ASCII 字符直接以 UTF-8 输出，不再转义为 ``\\uXXXX``。
+
+orjson 不支持的参数（如 ``indent=4``、``cls``）以及超出 64 位的整数会退回
+标准库。配置项 ``JSON_PROVIDER``：``auto``（默认，有 orjson 就用）、``orjson``、
+``std``。
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 非必装
+    orjson = None
+
+PROVIDERS = ('auto', 'orjson', 'std')
+_COMPACT_SEPARATORS = (',', ':')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """基于 orjson 的 JSON provider，遇到不支持的参数或数据时退回标准库。"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = self._option(kwargs)
+        if option is None:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+        except TypeError:
+            # orjson.JSONEncodeError 是 TypeError 的子类：超大整数、非字符串键排序等
+            return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def _option(self, kwargs) -> Any:
+        """把 json.dumps 参数转换为 orjson 的 option，无法转换时返回 None。"""
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+        for key, value in kwargs.items():
+            if key == 'separators' and tuple(value) == _COMPACT_SEPARATORS:
+                continue
+            if key == 'indent' and value in (None, 2):
+                option |= orjson.OPT_INDENT_2 if value else 0
+                continue
+            if key == 'ensure_ascii' and not value:
+                continue
+            if key in ('sort_keys', 'default'):
+                continue
+            return None
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+
+def build_json_provider(app, name: str = 'auto') -> DefaultJSONProvider:
+    """按配置名称创建 provider；指定 orjson 但未安装时报错。"""
+    if name not in PROVIDERS:
+        raise ValueError(f'不支持的 JSON_PROVIDER：{name}（可选 {", ".join(PROVIDERS)}）')
+    if name == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER=orjson 需要安装 orjson，请执行 `pip install orjson`.')
+    if name == 'std' or orjson is None:
+        return DefaultJSONProvider(app)
+    return OrjsonProvider(app)
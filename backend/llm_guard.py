@@ -0,0 +1,176 @@
+"""大模型调用保护：熔断器与相同请求合并（single-flight）。
+
+上游变慢或不可用时，每个请求都要等到客户端超时才失败或降级。熔断器统计连续
+失败次数（超过 slow_seconds 的调用也算一次失败），达到阈值后打开：打开期间的
+调用不再访问上游，直接抛出 ``CircuitOpenError``，由调用方降级或立即返回错误。
+只有 ``is_failure`` 判定为上游故障的异常才计入失败；请求本身的错误（如参数错误、
+鉴权失败）说明上游仍可用，不影响熔断状态。
+打开 reset_seconds 秒后进入半开状态，只放行一个试探请求，成功则关闭，失败则
+重新打开。
+
+``SingleFlight`` 让同一时刻的相同请求只调用一次上游，其余请求等待并共享结果
+（或异常）。
+
+两者都是进程内状态，gunicorn 多进程时每个进程各自熔断。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Optional
+
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+# Prometheus 指标中的状态值
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器打开，未调用上游。"""
+
+
+class CircuitBreaker:
+    """连续失败 / 慢调用熔断器（线程安全）。"""
+
+    def __init__(self, failure_threshold: int = 5, slow_seconds: float = 30.0, reset_seconds: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 is_failure: Optional[Callable[[BaseException], bool]] = None):
+        self.failure_threshold = failure_threshold
+        self.slow_seconds = slow_seconds
+        self.reset_seconds = reset_seconds
+        self.is_failure = is_failure or (lambda exc: True)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def allow(self) -> bool:
+        """是否允许本次调用；半开状态同一时刻只放行一个试探请求。"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, elapsed: float) -> None:
+        if elapsed >= self.slow_seconds:
+            self.record_failure(f'调用耗时 {elapsed:.1f}s，超过 {self.slow_seconds:g}s')
+            return
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.last_error = error
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probing = False
+
+    def record_exception(self, exc: BaseException) -> None:
+        """上游故障计为一次失败；其它错误不改变状态，只释放半开状态的试探名额。"""
+        if self.is_failure(exc):
+            self.record_failure(str(exc))
+            return
+        with self._lock:
+            self._probing = False
+
+    @contextmanager
+    def guard(self):
+        """包住一次上游调用：打开时抛出 CircuitOpenError，并按结果与耗时更新状态。"""
+        if not self.allow():
+            raise CircuitOpenError('大模型服务暂时不可用（已熔断），请稍后重试')
+        begin = time.perf_counter()
+        try:
+            yield
+        except Exception as exc:
+            self.record_exception(exc)
+            raise
+        except BaseException:
+            # 线程被中断等情况：不计入失败，但要释放半开状态的试探名额
+            with self._lock:
+                self._probing = False
+            raise
+        self.record_success(time.perf_counter() - begin)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._failures,
+                'opened': self.opened,
+                'rejected': self.rejected,
+                'last_error': self.last_error,
+            }
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """相同 key 的并发调用只执行一次，其余调用等待并共享结果。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.shared = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+            return flight.result
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
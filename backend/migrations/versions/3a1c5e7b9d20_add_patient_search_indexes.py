@@ -0,0 +1,73 @@
+"""add patient search indexes and name n-gram table
+
+Revision ID: 3a1c5e7b9d20
+Revises: f2b2d7d4a7c8
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a1c5e7b9d20'
+down_revision = 'f2b2d7d4a7c8'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 1000
+
+
+def _name_grams(name):
+    # 与 patient_search.name_grams 保持一致；迁移脚本不依赖应用代码
+    text = re.sub(r"\s+", "", name or "").lower()
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def upgrade():
+    grams_table = op.create_table(
+        'patient_name_grams',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('gram', sa.String(length=8), nullable=False),
+        sa.Column('patient_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['patient_id'], ['patients.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_patient_name_grams_gram_patient', 'patient_name_grams', ['gram', 'patient_id'])
+    op.create_index('ix_patient_name_grams_patient_id', 'patient_name_grams', ['patient_id'])
+    op.create_index('ix_patients_phone_number', 'patients', ['phone_number'])
+
+    # 为已有病人回填 gram
+    bind = op.get_bind()
+    patients = sa.table('patients', sa.column('id', sa.Integer), sa.column('name', sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(patients.c.id, patients.c.name)
+            .where(patients.c.id > last_id)
+            .order_by(patients.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        gram_rows = [
+            {'gram': gram, 'patient_id': patient_id}
+            for patient_id, name in rows
+            for gram in _name_grams(name)
+        ]
+        if gram_rows:
+            op.bulk_insert(grams_table, gram_rows)
+        last_id = rows[-1][0]
+
+
+def downgrade():
+    op.drop_index('ix_patients_phone_number', table_name='patients')
+    op.drop_index('ix_patient_name_grams_patient_id', table_name='patient_name_grams')
+    op.drop_index('ix_patient_name_grams_gram_patient', table_name='patient_name_grams')
+    op.drop_table('patient_name_grams')
@@ -0,0 +1,25 @@
+"""add created_at index for keyset pagination of patients
+
+Revision ID: 5b7d9f1e3c42
+Revises: 3a1c5e7b9d20
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7d9f1e3c42'
+down_revision = '3a1c5e7b9d20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # InnoDB 二级索引隐含主键，等价于 (created_at, id)，可直接服务游标分页
+    op.create_index('ix_patients_created_at', 'patients', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_patients_created_at', table_name='patients')
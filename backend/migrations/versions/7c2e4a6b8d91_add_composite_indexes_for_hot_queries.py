@@ -0,0 +1,33 @@
+"""add composite indexes for hot query shapes
+
+Revision ID: 7c2e4a6b8d91
+Revises: 5b7d9f1e3c42
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e4a6b8d91'
+down_revision = '5b7d9f1e3c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 病历：按病人筛选 + 按就诊时间排序
+    op.create_index('ix_medical_records_patient_id_record_date', 'medical_records', ['patient_id', 'record_date'])
+    # 病人：按科室筛选 + 按创建时间排序
+    op.create_index('ix_patients_department_created_at', 'patients', ['department', 'created_at'])
+    # 模板：按所有者 / 共享标记筛选 + 按更新时间排序
+    op.create_index('ix_templates_owner_id_updated_at', 'templates', ['owner_id', 'updated_at'])
+    op.create_index('ix_templates_is_shared_updated_at', 'templates', ['is_shared', 'updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_templates_is_shared_updated_at', table_name='templates')
+    op.drop_index('ix_templates_owner_id_updated_at', table_name='templates')
+    op.drop_index('ix_patients_department_created_at', table_name='patients')
+    op.drop_index('ix_medical_records_patient_id_record_date', table_name='medical_records')
@@ -0,0 +1,57 @@
+"""add maintained department and daily statistics tables
+
+Revision ID: 9d4f6a8c1e53
+Revises: 7c2e4a6b8d91
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f6a8c1e53'
+down_revision = '7c2e4a6b8d91'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'department_stats',
+        sa.Column('department', sa.String(length=50), nullable=False),
+        sa.Column('patient_count', sa.Integer(), nullable=False),
+        sa.Column('record_count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('department')
+    )
+    op.create_table(
+        'daily_stats',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('new_patients', sa.Integer(), nullable=False),
+        sa.Column('new_records', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('day')
+    )
+
+    # 用现有数据初始化计数（之后由应用增量维护，flask reconcile-stats 定期对账）
+    op.execute(
+        "INSERT INTO department_stats (department, patient_count, record_count) "
+        "SELECT p.department, COUNT(*), "
+        "(SELECT COUNT(*) FROM medical_records r JOIN patients rp ON rp.id = r.patient_id "
+        " WHERE rp.department = p.department) "
+        "FROM patients p GROUP BY p.department"
+    )
+    op.execute(
+        "INSERT INTO daily_stats (day, new_patients, new_records) "
+        "SELECT day, SUM(new_patients), SUM(new_records) FROM ("
+        " SELECT DATE(created_at) AS day, 1 AS new_patients, 0 AS new_records FROM patients"
+        " WHERE created_at IS NOT NULL"
+        " UNION ALL"
+        " SELECT DATE(record_date) AS day, 0 AS new_patients, 1 AS new_records FROM medical_records"
+        ") AS events GROUP BY day"
+    )
+
+
+def downgrade():
+    op.drop_table('daily_stats')
+    op.drop_table('department_stats')
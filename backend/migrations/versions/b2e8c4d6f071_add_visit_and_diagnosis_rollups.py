@@ -0,0 +1,43 @@
+"""add visit and diagnosis rollup tables
+
+Revision ID: b2e8c4d6f071
+Revises: 9d4f6a8c1e53
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2e8c4d6f071'
+down_revision = '9d4f6a8c1e53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 已有病历的汇总由 flask backfill-rollups 生成
+    op.create_table(
+        'visit_rollups',
+        sa.Column('period', sa.String(length=5), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('department', sa.String(length=50), nullable=False),
+        sa.Column('visits', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('period', 'period_start', 'department')
+    )
+    op.create_table(
+        'diagnosis_rollups',
+        sa.Column('period', sa.String(length=5), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('department', sa.String(length=50), nullable=False),
+        sa.Column('diagnosis', sa.String(length=100), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('period', 'period_start', 'department', 'diagnosis')
+    )
+
+
+def downgrade():
+    op.drop_table('diagnosis_rollups')
+    op.drop_table('visit_rollups')
@@ -0,0 +1,37 @@
+"""add ai_jobs table for async AI job state shared across workers
+
+Revision ID: c4f1a9e2d7b3
+Revises: b2e8c4d6f071
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f1a9e2d7b3'
+down_revision = 'b2e8c4d6f071'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'ai_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('owner', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ai_jobs_finished_at', 'ai_jobs', ['finished_at'])
+
+
+def downgrade():
+    op.drop_index('ix_ai_jobs_finished_at', table_name='ai_jobs')
+    op.drop_table('ai_jobs')
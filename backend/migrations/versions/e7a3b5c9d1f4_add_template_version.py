@@ -0,0 +1,25 @@
+"""add version counter to templates for serialization cache keys
+
+Revision ID: e7a3b5c9d1f4
+Revises: c4f1a9e2d7b3
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a3b5c9d1f4'
+down_revision = 'c4f1a9e2d7b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('templates', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    op.drop_column('templates', 'version')
@@ -0,0 +1,25 @@
+"""add started_at to ai_jobs for expiring jobs orphaned by killed workers
+
+Revision ID: f3c8d2a6b4e1
+Revises: e7a3b5c9d1f4
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8d2a6b4e1'
+down_revision = 'e7a3b5c9d1f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('ai_jobs', sa.Column('started_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('ai_jobs', 'started_at')
@@ -0,0 +1,113 @@
+"""分页工具：基于 (时间列, id) 的游标分页与可选的总数策略。
+
+OFFSET 分页越往后越慢，且每页都附带一次 `COUNT(*)`。游标分页记住上一页最后
+一行的排序键，下一页直接 `WHERE (created_at, id) < (...)` 走索引定位。
+
+总数（total）提供四种策略，由请求参数 `total` 指定：
+
+- ``exact``：每次执行 COUNT(*)（旧接口默认行为）；
+- ``none``：不计算总数；
+- ``cached``：相同筛选条件的 COUNT(*) 结果在进程内缓存若干秒；
+- ``estimate``：无筛选条件时读取 MySQL 统计信息中的估算行数，
+  其它情况退化为 ``cached``。
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy import text
+
+TOTAL_MODES = ('exact', 'none', 'cached', 'estimate')
+_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+class InvalidCursor(ValueError):
+    """游标无法解析（被篡改或来自不兼容的版本）。"""
+
+
+def encode_cursor(created_at: Optional[datetime], row_id: int) -> str:
+    """将最后一行的排序键编码为不透明的游标字符串。"""
+    payload = [created_at.strftime(_DATETIME_FORMAT) if created_at else None, row_id]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """解析游标，返回 (created_at, id)。"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if created_at is not None:
+            created_at = datetime.strptime(created_at, _DATETIME_FORMAT)
+        if not isinstance(row_id, int):
+            raise TypeError(row_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(cursor) from exc
+    return created_at, row_id
+
+
+def keyset_filter(created_at_column, id_column, created_at: Optional[datetime], row_id: int,
+                  nullable: bool = True):
+    """生成 `(时间列, id)` 降序排列下“位于游标之后”的过滤条件（病人 created_at / 病历 record_date）。
+
+    created_at 为 NULL 的行在 MySQL 与 SQLite 降序排列中都位于最后；
+    时间列非空时传 nullable=False 省去 IS NULL 分支。
+    """
+    if created_at is None:
+        return created_at_column.is_(None) & (id_column < row_id)
+    condition = (
+        (created_at_column < created_at)
+        | ((created_at_column == created_at) & (id_column < row_id))
+    )
+    if nullable:
+        condition = condition | created_at_column.is_(None)
+    return condition
+
+
+class TotalCountCache:
+    """按筛选条件缓存 COUNT(*) 结果的进程内 TTL 缓存（线程安全）。"""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], int]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+
+        value = compute()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (now + self.ttl_seconds, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def estimate_table_rows(session, table_name: str) -> Optional[int]:
+    """读取数据库统计信息中的估算行数；不支持的数据库返回 None。"""
+    bind = session.get_bind()
+    if bind.dialect.name != 'mysql':
+        return None
+    row = session.execute(
+        text(
+            'SELECT TABLE_ROWS FROM information_schema.TABLES '
+            'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :name'
+        ),
+        {'name': table_name},
+    ).first()
+    return int(row[0]) if row and row[0] is not None else None
@@ -0,0 +1,95 @@
+"""病人与病历批量导出：服务端游标 + 分块读取，流式输出 NDJSON / CSV。
+
+直接执行 Core 查询读取列元组，不构造 ORM 对象；`stream_results` 让 MySQL
+使用服务端游标（pymysql SSCursor），`yield_per` 控制每次从游标取回的行数。
+每个分块序列化成一段文本后立即交给 HTTP 分块响应或文件，内存占用与导出
+行数无关。
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional, Sequence
+
+from sqlalchemy import select
+
+FORMATS = ('ndjson', 'csv')
+ENTITIES = ('patients', 'records')
+DEFAULT_CHUNK_SIZE = 1000
+
+PATIENT_COLUMNS = ('id', 'name', 'id_card', 'age', 'gender', 'phone_number', 'department', 'created_at')
+RECORD_COLUMNS = ('id', 'patient_id', 'record_date', 'symptom', 'diagnosis', 'treatment_plan',
+                  'medical_history', 'allergy_history')
+
+_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def parse_date(value: Optional[str]) -> Optional[date]:
+    """解析 YYYY-MM-DD，空值返回 None，格式错误抛出 ValueError。"""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def build_export_query(entity: str, patient_table, record_table, department: Optional[str] = None,
+                       start: Optional[date] = None, end: Optional[date] = None):
+    """病人按 created_at、病历按 record_date 过滤日期范围（end 当天包含在内）。"""
+    if entity == 'patients':
+        columns = [patient_table.c[name] for name in PATIENT_COLUMNS]
+        stmt = select(*columns)
+        date_column = patient_table.c.created_at
+        id_column = patient_table.c.id
+        if department:
+            stmt = stmt.where(patient_table.c.department == department)
+    else:
+        columns = [record_table.c[name] for name in RECORD_COLUMNS]
+        stmt = select(*columns)
+        date_column = record_table.c.record_date
+        id_column = record_table.c.id
+        if department:
+            stmt = stmt.join(patient_table, patient_table.c.id == record_table.c.patient_id).where(
+                patient_table.c.department == department
+            )
+
+    if start:
+        stmt = stmt.where(date_column >= datetime.combine(start, datetime.min.time()))
+    if end:
+        stmt = stmt.where(date_column < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    return stmt.order_by(id_column)
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return value.strftime(_DATETIME_FORMAT)
+    return value
+
+
+def iter_export(session, stmt, fmt: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """按分块产出序列化后的文本。"""
+    if fmt not in FORMATS:
+        raise ValueError(f'不支持的格式：{fmt}')
+
+    result = session.execute(stmt.execution_options(stream_results=True, yield_per=chunk_size))
+    keys: Sequence[str] = list(result.keys())
+
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(keys)
+        yield buffer.getvalue()
+
+    for rows in result.partitions(chunk_size):
+        if fmt == 'ndjson':
+            lines: List[str] = [
+                json.dumps(dict(zip(keys, map(_format_value, row))), ensure_ascii=False)
+                for row in rows
+            ]
+            yield '\n'.join(lines) + '\n'
+        else:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows([_format_value(value) for value in row] for row in rows)
+            yield buffer.getvalue()
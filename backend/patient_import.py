@@ -0,0 +1,220 @@
+"""病人批量导入：流式读取 CSV / JSONL，按批校验、去重并多行插入。
+
+逐条调用 `add_patient` 时每个病人都要一次唯一性查询、一次插入和一次提交。
+这里按批（默认 1000 行）处理：
+
+1. 逐行解析并校验必填项、身份证格式、科室、年龄；
+2. 批内身份证去重，再用一条 `WHERE id_card IN (...)` 查询已存在的记录；
+3. 剩余行一次多行插入，随后为新病人写入姓名 n-gram，整批一次提交。
+
+输入按行流式读取，错误明细最多保留 MAX_REPORTED_ERRORS 条，内存占用与文件
+大小无关。文件无法按 UTF-8 解码或 CSV 结构损坏时抛出 ``ImportFormatError``，
+此前已提交的批次保留，报告随异常返回。
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from patient_search import name_grams
+
+FORMATS = ('csv', 'jsonl')
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+_ID_CARD_RE = re.compile(r'^\d{17}[\dX]$')
+
+
+class ImportFormatError(ValueError):
+    """文件无法解析；report 为出错前的导入报告（由 import_patients 填写）。"""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.report: Optional['ImportReport'] = None
+
+
+class ImportReport:
+    def __init__(self):
+        self.total = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+
+    def add_error(self, line: int, message: str, id_card: Optional[str] = None) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'id_card': id_card, 'message': message})
+
+    def to_dict(self) -> Dict:
+        return {
+            'total': self.total,
+            'inserted': self.inserted,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def iter_rows(stream, fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """逐行产出 (行号, 数据, 解析错误)。stream 为二进制或文本文件对象。"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='') if not isinstance(stream, io.TextIOBase) else stream
+    try:
+        yield from _parse_rows(text, fmt)
+    except UnicodeDecodeError as exc:
+        # Excel 导出中文 CSV 默认为 GBK
+        raise ImportFormatError('文件不是 UTF-8 编码，请另存为“CSV UTF-8”后重新导入') from exc
+    except csv.Error as exc:
+        raise ImportFormatError(f'CSV 格式错误：{exc}') from exc
+
+
+def _parse_rows(text, fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_no, None, f'JSON 解析失败：{exc.msg}'
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, '每行必须是 JSON 对象'
+            continue
+        yield line_no, row, None
+
+
+def validate_row(row: Dict, valid_departments: Iterable[str]) -> Tuple[Optional[Dict], Optional[str]]:
+    """校验一行并转换为 patients 表的插入数据。"""
+    name = str(row.get('name') or '').strip()
+    id_card = str(row.get('id_card') or '').strip().upper()
+    if not name or not id_card:
+        return None, '姓名和身份证号不能为空'
+    if not _ID_CARD_RE.match(id_card):
+        return None, '身份证号格式错误'
+
+    department = str(row.get('department') or '内科').strip()
+    if department not in valid_departments:
+        return None, '无效的科室'
+
+    age = row.get('age')
+    if age in (None, ''):
+        age = None
+    else:
+        try:
+            age = int(age)
+        except (TypeError, ValueError):
+            return None, '年龄必须是整数'
+
+    return {
+        'name': name,
+        'id_card': id_card,
+        'age': age,
+        'gender': str(row.get('gender') or '男').strip(),
+        'phone_number': str(row.get('phone_number') or '').strip() or None,
+        'department': department,
+    }, None
+
+
+def import_patients(stream, fmt: str, session, patient_table, gram_table, valid_departments: Iterable[str],
+                    batch_size: int = DEFAULT_BATCH_SIZE,
+                    on_insert: Optional[Callable[[object, List[Dict]], None]] = None) -> ImportReport:
+    """流式导入病人，返回导入报告。每批单独提交，失败的批次不影响已提交的批次。
+
+    on_insert(session, rows) 在每次插入后、提交前调用，用于在同一事务中维护
+    派生数据（如科室计数）。
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'不支持的格式：{fmt}')
+
+    valid_departments = set(valid_departments)
+    report = ImportReport()
+    batch: List[Tuple[int, Dict]] = []
+
+    try:
+        for line_no, row, error in iter_rows(stream, fmt):
+            report.total += 1
+            if error:
+                report.add_error(line_no, error)
+                continue
+            values, error = validate_row(row, valid_departments)
+            if error:
+                report.add_error(line_no, error, str(row.get('id_card') or '') or None)
+                continue
+            batch.append((line_no, values))
+            if len(batch) >= batch_size:
+                _flush_batch(batch, session, patient_table, gram_table, report, on_insert)
+                batch = []
+    except ImportFormatError as exc:
+        exc.report = report
+        raise
+
+    if batch:
+        _flush_batch(batch, session, patient_table, gram_table, report, on_insert)
+    return report
+
+
+def _flush_batch(batch, session, patient_table, gram_table, report: ImportReport, on_insert=None) -> None:
+    # 批内去重
+    unique: Dict[str, Tuple[int, Dict]] = {}
+    for line_no, values in batch:
+        if values['id_card'] in unique:
+            report.add_error(line_no, '文件中身份证号重复', values['id_card'])
+        else:
+            unique[values['id_card']] = (line_no, values)
+
+    # 一次查询检查已存在的身份证号
+    existing = {
+        id_card for (id_card,) in session.execute(
+            patient_table.select().with_only_columns(patient_table.c.id_card)
+            .where(patient_table.c.id_card.in_(list(unique)))
+        )
+    }
+    rows = []
+    for id_card, (line_no, values) in unique.items():
+        if id_card in existing:
+            report.add_error(line_no, '该身份证号已存在', id_card)
+        else:
+            rows.append((line_no, values))
+    if not rows:
+        return
+
+    try:
+        _insert_rows([values for _, values in rows], session, patient_table, gram_table, on_insert)
+        session.commit()
+        report.inserted += len(rows)
+    except IntegrityError:
+        # 与并发写入冲突：回滚整批后逐行插入以定位失败的行
+        session.rollback()
+        for line_no, values in rows:
+            try:
+                _insert_rows([values], session, patient_table, gram_table, on_insert)
+                session.commit()
+                report.inserted += 1
+            except IntegrityError:
+                session.rollback()
+                report.add_error(line_no, '该身份证号已存在', values['id_card'])
+
+
+def _insert_rows(rows: List[Dict], session, patient_table, gram_table, on_insert=None) -> None:
+    session.execute(patient_table.insert(), rows)
+    # 多行插入拿不到自增 id（MySQL 不支持 RETURNING），按身份证号取回后写入姓名 gram
+    inserted = session.execute(
+        patient_table.select().with_only_columns(patient_table.c.id, patient_table.c.name)
+        .where(patient_table.c.id_card.in_([row['id_card'] for row in rows]))
+    )
+    grams = [{'gram': gram, 'patient_id': patient_id} for patient_id, name in inserted for gram in name_grams(name)]
+    if grams:
+        session.execute(gram_table.insert(), grams)
+    if on_insert is not None:
+        on_insert(session, rows)
@@ -0,0 +1,93 @@
+"""病人检索：身份证/手机号走前缀索引，姓名走 n-gram 倒排表。
+
+`%关键字%` 形式的 LIKE 无法命中任何索引，病人表一大就只能全表扫描。
+这里把检索词分成两类：
+
+- 纯数字（身份证末位可为 X）：按身份证精确匹配或身份证/手机号前缀匹配，
+  前缀改写成 `>= 前缀 AND < 前缀上界` 的区间比较，可以直接使用 B-Tree 索引；
+- 其它（主要是中文姓名）：姓名预先切成单字与二字 gram 存入
+  `patient_name_grams`，检索时先用 gram 表求交集得到候选病人，
+  再用原始 LIKE 在候选集内做精确校验。
+
+gram 表是普通的 (gram, patient_id) 二级索引，MySQL 与 SQLite 均可使用。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List, Set
+
+from sqlalchemy import func
+
+# 身份证号 18 位，末位可能是 X；手机号为纯数字
+_DIGIT_TERM_RE = re.compile(r"^\d+[xX]?$")
+ID_CARD_LENGTH = 18
+
+# 检索词过长时只取前若干个 gram，避免 IN 列表过大
+MAX_QUERY_GRAMS = 8
+
+
+def normalize_name(name: str | None) -> str:
+    """姓名规范化：去掉空白并转小写（兼容拼音/英文姓名）。"""
+    if not name:
+        return ""
+    return re.sub(r"\s+", "", name).lower()
+
+
+def name_grams(name: str | None) -> Set[str]:
+    """将姓名切分为单字与相邻二字 gram，用于写入 gram 表。"""
+    text = normalize_name(name)
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def query_grams(term: str) -> List[str]:
+    """检索词对应的 gram：单字直接查单字 gram，否则查相邻二字 gram。"""
+    text = normalize_name(term)
+    if len(text) <= 1:
+        return [text] if text else []
+    grams: List[str] = []
+    for i in range(len(text) - 1):
+        gram = text[i:i + 2]
+        if gram not in grams:
+            grams.append(gram)
+    return grams[:MAX_QUERY_GRAMS]
+
+
+def is_numeric_term(term: str) -> bool:
+    """是否为身份证号/手机号形式的检索词。"""
+    return bool(_DIGIT_TERM_RE.match(term))
+
+
+def _prefix_range(column, prefix: str):
+    """前缀匹配改写为区间比较，保证 MySQL/SQLite 都能走 B-Tree 索引。"""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return (column >= prefix) & (column < upper)
+
+
+def build_search_filter(term: str, patient_model, gram_model, session):
+    """根据检索词生成 `Patient.query.filter(...)` 可用的过滤条件。
+
+    - 18 位身份证：精确匹配（唯一索引）；
+    - 其它数字串：身份证或手机号前缀匹配；
+    - 其它：gram 表求交集 + 姓名子串校验。
+    """
+    term = term.strip()
+
+    if is_numeric_term(term):
+        if len(term) == ID_CARD_LENGTH:
+            return patient_model.id_card == term.upper()
+        return _prefix_range(patient_model.id_card, term.upper()) | _prefix_range(patient_model.phone_number, term)
+
+    grams = query_grams(term)
+    if not grams:
+        return patient_model.name.contains(term, autoescape=True)
+
+    candidate_ids = session.query(gram_model.patient_id).filter(
+        gram_model.gram.in_(grams)
+    ).group_by(gram_model.patient_id).having(
+        func.count(func.distinct(gram_model.gram)) == len(grams)
+    )
+
+    return patient_model.id.in_(candidate_ids) & patient_model.name.contains(term, autoescape=True)
@@ -0,0 +1,184 @@
+"""病历时序汇总（rollup）：按日 / 周 / 月统计各科室就诊量与诊断分布。
+
+分析接口只读汇总表，不扫描 medical_records：
+
+- ``visit_rollups``：(粒度, 周期起始日, 科室) -> 就诊量；
+- ``diagnosis_rollups``：(粒度, 周期起始日, 科室, 诊断) -> 次数。
+
+新增、删除病历以及修改诊断时，由 MedicalRecord 的写入事件在同一事务中累加；
+病人转科时其全部病历的汇总随之转到新科室（与 department_stats 一致，病历归属
+病人当前所在科室）。``backfill`` 用两条 GROUP BY 查询重建全部汇总，用于首次
+上线或修正偏差。
+
+诊断是自由文本，汇总键取去掉首尾空格后的前 DIAGNOSIS_KEY_LENGTH 个字符。
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from department_stats import as_date, increment
+
+PERIODS = ('day', 'week', 'month')
+DIAGNOSIS_KEY_LENGTH = 100
+
+
+def period_start(day: date, period: str) -> date:
+    """周期起始日：日为当天，周为周一，月为 1 号。"""
+    if period == 'day':
+        return day
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    raise ValueError(f'不支持的粒度：{period}')
+
+
+def diagnosis_key(diagnosis: Optional[str]) -> str:
+    return (diagnosis or '').strip(' ')[:DIAGNOSIS_KEY_LENGTH]
+
+
+class RollupDeltas:
+    """一次写入对各汇总行的增量，按行合并后落库。"""
+
+    def __init__(self):
+        self.visits: Dict[Tuple[str, date, str], int] = defaultdict(int)
+        self.diagnoses: Dict[Tuple[str, date, str, str], int] = defaultdict(int)
+
+    def add(self, record_date, department: str, diagnosis: Optional[str], sign: int = 1,
+            visits: bool = True) -> None:
+        day = record_date.date() if isinstance(record_date, datetime) else record_date
+        key = diagnosis_key(diagnosis)
+        for period in PERIODS:
+            start = period_start(day, period)
+            if visits:
+                self.visits[(period, start, department)] += sign
+            self.diagnoses[(period, start, department, key)] += sign
+
+    def apply(self, connection, visit_table, diagnosis_table) -> None:
+        # 与 CounterDeltas.apply 相同，按 (科室, 粒度, 周期起始日[, 诊断]) 排序后落库，保证加锁顺序一致
+        visits = sorted(self.visits.items(), key=lambda item: (item[0][2], item[0][0], item[0][1]))
+        diagnoses = sorted(self.diagnoses.items(), key=lambda item: (item[0][2], item[0][0], item[0][1], item[0][3]))
+        for (period, start, department), delta in visits:
+            increment(connection, visit_table,
+                      {'period': period, 'period_start': start, 'department': department}, {'visits': delta})
+        for (period, start, department, diagnosis), delta in diagnoses:
+            increment(connection, diagnosis_table,
+                      {'period': period, 'period_start': start, 'department': department, 'diagnosis': diagnosis},
+                      {'count': delta})
+
+
+def _range_filter(table, period: str, start: Optional[date], end: Optional[date]):
+    # 包含 start、end 所在的整个周期
+    conditions = [table.c.period == period]
+    if start:
+        conditions.append(table.c.period_start >= period_start(start, period))
+    if end:
+        conditions.append(table.c.period_start <= end)
+    return conditions
+
+
+def visit_series(session, visit_table, period: str, start: Optional[date] = None, end: Optional[date] = None,
+                 department: Optional[str] = None) -> List[Dict]:
+    """各周期、各科室的就诊量，按周期升序。"""
+    conditions = _range_filter(visit_table, period, start, end)
+    if department:
+        conditions.append(visit_table.c.department == department)
+    rows = session.execute(
+        select(visit_table.c.period_start, visit_table.c.department, visit_table.c.visits)
+        .where(*conditions, visit_table.c.visits != 0)
+        .order_by(visit_table.c.period_start, visit_table.c.department)
+    )
+    return [
+        {'period_start': as_date(start_day).isoformat(), 'department': dept, 'visits': visits}
+        for start_day, dept, visits in rows
+    ]
+
+
+def top_diagnoses(session, diagnosis_table, period: str, start: Optional[date] = None, end: Optional[date] = None,
+                  department: Optional[str] = None, limit: int = 10) -> List[Dict]:
+    """每个周期内次数最多的 limit 个诊断（多个科室时合并计数）。"""
+    conditions = _range_filter(diagnosis_table, period, start, end)
+    if department:
+        conditions.append(diagnosis_table.c.department == department)
+    total = func.sum(diagnosis_table.c.count)
+    rows = session.execute(
+        select(diagnosis_table.c.period_start, diagnosis_table.c.diagnosis, total)
+        .where(*conditions)
+        .group_by(diagnosis_table.c.period_start, diagnosis_table.c.diagnosis)
+        .having(total > 0)
+    )
+    by_period: Dict[date, List[Tuple[int, str]]] = defaultdict(list)
+    for start_day, diagnosis, count in rows:
+        by_period[as_date(start_day)].append((int(count), diagnosis))
+    return [
+        {
+            'period_start': start_day.isoformat(),
+            'diagnoses': [
+                {'diagnosis': diagnosis, 'count': count}
+                for count, diagnosis in heapq.nlargest(limit, entries)
+            ],
+        }
+        for start_day, entries in sorted(by_period.items())
+    ]
+
+
+def backfill(session, patient_table, record_table, visit_table, diagnosis_table,
+             chunk_size: int = 5000) -> Dict[str, int]:
+    """清空并按现有病历重建全部汇总，返回写入的行数。
+
+    数据库按 (日期, 科室[, 诊断]) 聚合，Python 只把日汇总累加为周、月汇总。
+    重建期间新写入的病历可能被覆盖，应在维护窗口执行。
+    """
+    joined = record_table.join(patient_table, patient_table.c.id == record_table.c.patient_id)
+    day = func.date(record_table.c.record_date)
+
+    visits: Dict[Tuple[str, date, str], int] = defaultdict(int)
+    for record_day, department, count in session.execute(
+        select(day, patient_table.c.department, func.count()).select_from(joined)
+        .group_by(day, patient_table.c.department)
+    ):
+        record_day = as_date(record_day)
+        for period in PERIODS:
+            visits[(period, period_start(record_day, period), department)] += count
+
+    key = func.substr(func.trim(record_table.c.diagnosis), 1, DIAGNOSIS_KEY_LENGTH)
+    diagnoses: Dict[Tuple[str, date, str, str], int] = defaultdict(int)
+    result = session.execute(
+        select(day, patient_table.c.department, key, func.count()).select_from(joined)
+        .group_by(day, patient_table.c.department, key)
+        .execution_options(stream_results=True, yield_per=chunk_size)
+    )
+    for record_day, department, diagnosis, count in result:
+        record_day = as_date(record_day)
+        for period in PERIODS:
+            diagnoses[(period, period_start(record_day, period), department, diagnosis or '')] += count
+
+    session.execute(visit_table.delete())
+    session.execute(diagnosis_table.delete())
+    _bulk_insert(session, visit_table, (
+        {'period': period, 'period_start': start, 'department': department, 'visits': count}
+        for (period, start, department), count in visits.items()
+    ), chunk_size)
+    _bulk_insert(session, diagnosis_table, (
+        {'period': period, 'period_start': start, 'department': department, 'diagnosis': diagnosis, 'count': count}
+        for (period, start, department, diagnosis), count in diagnoses.items()
+    ), chunk_size)
+    session.commit()
+    return {visit_table.name: len(visits), diagnosis_table.name: len(diagnoses)}
+
+
+def _bulk_insert(session, table, rows: Iterable[Dict], chunk_size: int) -> None:
+    chunk: List[Dict] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            session.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        session.execute(table.insert(), chunk)
@@ -0,0 +1,290 @@
+"""按接口统计请求耗时构成（可选，默认关闭）。
+
+开启 ``INSTRUMENTATION_ENABLED`` 后，每个请求记录：
+
+- 总耗时（before_request 到 teardown_request，流式响应包含发送过程）；
+- SQL 语句数与执行时间（引擎的 before/after_cursor_execute 事件）；
+- 大模型调用时间（ai_service 中用 ``track('llm')`` 包住调用）；
+- JSON 序列化时间（包装 ``app.json.dumps``）。
+
+同时检查两类 N+1 模式：同一条 SQL 在一个请求中执行 N_PLUS_ONE_THRESHOLD 次以上；
+一个请求先后按主键单独查询多张表（如 ``Patient.query.get_or_404`` 后再
+``MedicalRecord.query.get_or_404``），可以合并为一条连接查询。
+
+汇总数据以 Prometheus 文本格式由 ``/metrics`` 输出（每个进程各自统计，gunicorn 多
+进程时需分别抓取）。``PROFILE_SAMPLE_RATE`` 大于 0 时按比例对请求做 cProfile，
+结果写到 PROFILE_DIR，可用 ``python -m pstats`` 或 snakeviz 查看。
+
+关闭时不注册任何钩子和事件，只剩 ``track`` 中一次 ContextVar 读取。
+"""
+
+from __future__ import annotations
+
+import cProfile
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import Response, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PHASES = ('llm', 'serialization')
+
+# Session.get / get_or_404 生成的按主键查询：FROM t WHERE t.id = <参数>
+_PK_LOOKUP = re.compile(r'\bFROM (\w+)\s+WHERE \1\.id = (?:\?|%s|%\(\w+\)s|:\w+)\s*$', re.IGNORECASE)
+
+_current: ContextVar[Optional['RequestStats']] = ContextVar('request_metrics', default=None)
+_engine_events_installed = False
+
+
+class RequestStats:
+    """单个请求的统计，只在处理该请求的线程中读写。"""
+
+    __slots__ = ('started', 'status', 'sql_count', 'sql_time', 'phases', 'statements', 'profiler')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.status = 500
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.statements: Counter = Counter()
+        self.profiler: Optional[cProfile.Profile] = None
+
+    def n_plus_one(self, threshold: int) -> List[Tuple[str, str]]:
+        """返回 (类型, 说明) 列表，没有可疑模式时为空。"""
+        findings = []
+        for statement, count in self.statements.items():
+            if count >= threshold:
+                findings.append(('repeated_statement', f'执行 {count} 次：{_one_line(statement)}'))
+        tables = []
+        for statement in self.statements:
+            match = _PK_LOOKUP.search(statement)
+            if match and match.group(1) not in tables:
+                tables.append(match.group(1))
+        if len(tables) > 1:
+            findings.append(('pk_lookup_chain', f'按主键分别查询 {", ".join(tables)}，可合并为一条连接查询'))
+        return findings
+
+
+def _one_line(statement: str, limit: int = 200) -> str:
+    text = ' '.join(statement.split())
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+@contextmanager
+def track(phase: str):
+    """把代码块的耗时计入当前请求的某个阶段；未开启或不在请求中时不做任何事。"""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.phases[phase] += time.perf_counter() - begin
+
+
+class _RouteSeries:
+    __slots__ = ('buckets', 'count', 'duration', 'sql_count', 'sql_time', 'phases', 'errors')
+
+    def __init__(self):
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.duration = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.errors = 0
+
+
+class MetricsRegistry:
+    """按 (路由, 方法) 累计的进程内指标（线程安全）。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], _RouteSeries] = defaultdict(_RouteSeries)
+        self._n_plus_one: Counter = Counter()
+        self._reported = set()
+        self._extra: List[Tuple[str, str, str, Callable[[], float]]] = []
+        self.profiles = 0
+
+    def add_metric(self, name: str, kind: str, help_text: str, value: Callable[[], float]) -> None:
+        """注册一个无标签的指标（gauge / counter），输出时调用 value() 取当前值。"""
+        self._extra.append((name, kind, help_text, value))
+
+    def observe(self, route: str, method: str, stats: RequestStats, duration: float,
+                findings: List[Tuple[str, str]]) -> None:
+        with self._lock:
+            series = self._routes[(route, method)]
+            series.count += 1
+            series.duration += duration
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    series.buckets[index] += 1
+                    break
+            series.sql_count += stats.sql_count
+            series.sql_time += stats.sql_time
+            for phase, spent in stats.phases.items():
+                series.phases[phase] += spent
+            if stats.status >= 500:
+                series.errors += 1
+            for kind, _ in findings:
+                self._n_plus_one[(route, method, kind)] += 1
+            new_findings = [(kind, detail) for kind, detail in findings if (route, method, kind) not in self._reported]
+            self._reported.update((route, method, kind) for kind, _ in new_findings)
+        # 每个 (路由, 类型) 只记录一次日志，之后只累加计数
+        for kind, detail in new_findings:
+            logger.warning('疑似 N+1 查询 %s %s [%s] %s', method, route, kind, detail)
+
+    def count_profile(self) -> int:
+        with self._lock:
+            self.profiles += 1
+            return self.profiles
+
+    def render(self) -> str:
+        """Prometheus 文本格式（text/plain; version=0.0.4）。"""
+        with self._lock:
+            routes = sorted(self._routes.items())
+            n_plus_one = sorted(self._n_plus_one.items())
+            profiles = self.profiles
+            lines = []
+
+            def header(name, kind, help_text):
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+
+            header('hms_request_duration_seconds', 'histogram', '请求总耗时')
+            for (route, method), series in routes:
+                labels = _labels(route=route, method=method)
+                cumulative = 0
+                for bound, count in zip(DURATION_BUCKETS, series.buckets):
+                    cumulative += count
+                    lines.append(f'hms_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'hms_request_duration_seconds_bucket{{{labels},le="+Inf"}} {series.count}')
+                lines.append(f'hms_request_duration_seconds_sum{{{labels}}} {series.duration:.6f}')
+                lines.append(f'hms_request_duration_seconds_count{{{labels}}} {series.count}')
+
+            counters = (
+                ('hms_request_sql_statements_total', 'SQL 语句数', lambda s: s.sql_count),
+                ('hms_request_sql_seconds_total', 'SQL 执行时间', lambda s: f'{s.sql_time:.6f}'),
+                ('hms_request_llm_seconds_total', '大模型调用时间', lambda s: f"{s.phases['llm']:.6f}"),
+                ('hms_request_serialization_seconds_total', 'JSON 序列化时间',
+                 lambda s: f"{s.phases['serialization']:.6f}"),
+                ('hms_request_errors_total', '状态码 5xx 的请求数', lambda s: s.errors),
+            )
+            for name, help_text, value in counters:
+                header(name, 'counter', help_text)
+                for (route, method), series in routes:
+                    lines.append(f'{name}{{{_labels(route=route, method=method)}}} {value(series)}')
+
+            header('hms_request_n_plus_one_total', 'counter', '出现疑似 N+1 查询的请求数')
+            for (route, method, kind), count in n_plus_one:
+                lines.append(f'hms_request_n_plus_one_total{{{_labels(route=route, method=method, kind=kind)}}} {count}')
+
+            header('hms_request_profiles_total', 'counter', '已保存的 cProfile 采样数')
+            lines.append(f'hms_request_profiles_total {profiles}')
+
+            for name, kind, help_text, value in self._extra:
+                header(name, kind, help_text)
+                lines.append(f'{name} {value()}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels: str) -> str:
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('request_metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get('request_metrics_started')
+    if stats is None or not started:
+        return
+    stats.sql_time += time.perf_counter() - started.pop()
+    stats.sql_count += 1
+    stats.statements[statement] += 1
+
+
+def init_app(app, threshold: int, sample_rate: float = 0.0, profile_dir: str = 'profiles') -> MetricsRegistry:
+    """注册请求钩子、SQL 事件与 /metrics 接口，返回该应用的指标表。"""
+    global _engine_events_installed
+    registry = MetricsRegistry()
+    app.extensions['request_metrics'] = registry
+
+    if not _engine_events_installed:
+        # 监听 Engine 类：对主库、只读副本等全部引擎生效；不在请求中时直接返回
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _engine_events_installed = True
+
+    dumps = app.json.dumps
+
+    def timed_dumps(obj, **kwargs):
+        with track('serialization'):
+            return dumps(obj, **kwargs)
+
+    app.json.dumps = timed_dumps
+
+    if sample_rate > 0:
+        os.makedirs(profile_dir, exist_ok=True)
+
+    @app.before_request
+    def start_request_metrics():
+        if request.endpoint == 'metrics':
+            return
+        stats = RequestStats()
+        if sample_rate > 0 and random.random() < sample_rate:
+            stats.profiler = cProfile.Profile()
+            stats.profiler.enable()
+        _current.set(stats)
+
+    @app.after_request
+    def record_status(response):
+        stats = _current.get()
+        if stats is not None:
+            stats.status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc=None):
+        stats = _current.get()
+        if stats is None:
+            return
+        _current.set(None)
+        duration = time.perf_counter() - stats.started
+        route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+        if stats.profiler is not None:
+            stats.profiler.disable()
+            name = '{}-{}-{}-{}-{}ms.prof'.format(
+                time.strftime('%Y%m%d-%H%M%S'), request.endpoint or 'unmatched', os.getpid(),
+                registry.count_profile(), int(duration * 1000),
+            )
+            stats.profiler.dump_stats(os.path.join(profile_dir, name))
+        registry.observe(route, request.method, stats, duration, stats.n_plus_one(threshold))
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    return registry
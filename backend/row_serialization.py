@@ -0,0 +1,37 @@
+"""列表接口的轻量序列化：直接查询列元组，不构造 ORM 对象。
+
+列表接口原来逐行构造 Patient / MedicalRecord 实例（身份映射、属性状态跟踪），
+再调用 ``to_dict``。只读列表并不需要这些，查询列元组后按列名拼字典即可；
+时间字段用 ``isoformat`` 格式化，结果与 ``strftime('%Y-%m-%d %H:%M:%S')`` 相同
+但快得多。
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Sequence
+
+
+def format_datetime(value: Optional[datetime]) -> Optional[str]:
+    """格式化为 ``YYYY-MM-DD HH:MM:SS``（去掉微秒）。"""
+    return value.isoformat(' ', 'seconds') if value is not None else None
+
+
+def row_serializer(keys: Sequence[str], datetime_keys: Iterable[str] = ()) -> Callable[[Sequence], Dict]:
+    """返回把一行列元组转换为字典的函数。
+
+    行中多出的列（如游标分页需要但未请求的排序列）会被忽略，因此只需把
+    这些列放在 keys 对应的列之后。
+    """
+    keys = tuple(keys)
+    datetime_keys = [key for key in keys if key in set(datetime_keys)]
+
+    def serialize(row) -> Dict:
+        data = dict(zip(keys, row))
+        for key in datetime_keys:
+            value = data[key]
+            if value is not None:
+                data[key] = value.isoformat(' ', 'seconds')
+        return data
+
+    return serialize
@@ -0,0 +1,61 @@
+"""模板序列化缓存：按 (模板 id, version) 缓存解析后的字典与预渲染的 JSON 片段。
+
+`Template.to_dict` 每次都要 `json.loads` 模板内容并格式化两个时间字段，
+模板列表接口又会对整个模板库重复这一过程。缓存命中后列表接口只需查询
+(id, version) 两列，再把缓存的 JSON 片段直接拼接输出。
+
+缓存在每个进程内各自维护，进程之间不通知失效。version 为模板表的版本号列，
+每次修改都在数据库中加 1，因此其它进程的修改也会在下次比较版本时被发现；
+不能用 updated_at 代替（MySQL 上只精确到秒，同一秒内的修改无法区分）。
+本进程的修改/删除另外显式失效对应条目，尽早释放旧内容。
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+
+class SerializedTemplate(NamedTuple):
+    version: Any
+    data: Dict
+    fragment: str
+
+
+class TemplateSerializationCache:
+    """线程安全的 LRU 缓存：模板 id -> SerializedTemplate。"""
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, SerializedTemplate]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, tpl_id: int, version: Any = None, any_version: bool = False) -> Optional[SerializedTemplate]:
+        """取缓存条目；版本不一致视为未命中（any_version=True 时忽略版本）。"""
+        with self._lock:
+            entry = self._entries.get(tpl_id)
+            if entry is None or (not any_version and entry.version != version):
+                return None
+            self._entries.move_to_end(tpl_id)
+            return entry
+
+    def put(self, tpl_id: int, version: Any, data: Dict, fragment: str) -> SerializedTemplate:
+        entry = SerializedTemplate(version, data, fragment)
+        with self._lock:
+            self._entries[tpl_id] = entry
+            self._entries.move_to_end(tpl_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, tpl_id: int) -> None:
+        with self._lock:
+            self._entries.pop(tpl_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,234 @@
+"""模板本地检索：基于字符 n-gram 的 BM25 倒排索引（纯 CPU，无外部依赖）。
+
+模板库变大后，把全部模板塞进一个提示词既慢又贵，还会超出上下文窗口。
+这里先在本地按症状召回 top-k 候选，只把候选交给大模型重排；大模型不可用时
+直接返回召回结果。
+
+索引内容为模板名称、症状与诊断。中文按单字 + 相邻二字切分，英文/数字按整词，
+不依赖分词库。索引支持按模板增量更新与删除。
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, Hashable, Iterable, List, Optional, Tuple
+
+# BM25 参数
+K1 = 1.2
+B = 0.75
+
+_SEGMENT_RE = re.compile(r'[a-z0-9]+|[\u3400-\u9fff]+')
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """中文切成单字与二字 gram，英文/数字保留整词。"""
+    tokens: List[str] = []
+    for segment in _SEGMENT_RE.findall((text or '').lower()):
+        if segment.isascii():
+            tokens.append(segment)
+            continue
+        tokens.extend(segment)
+        tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+    return tokens
+
+
+def template_text(name: Optional[str], content, include_plan: bool = False) -> str:
+    """拼出参与索引的文本：名称 + 症状 + 诊断（可选附带治疗方案）。"""
+    if isinstance(content, str):
+        try:
+            content = json.loads(content)
+        except Exception:
+            content = {'symptom': content}
+    if not isinstance(content, dict):
+        content = {}
+    parts = [name or '', content.get('symptom') or '', content.get('diagnosis') or '']
+    if include_plan:
+        parts.append(content.get('treatment_plan') or '')
+    return '\n'.join(str(part) for part in parts)
+
+
+class TemplateIndex:
+    """线程安全的 BM25 倒排索引，文档为模板。"""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._doc_tokens: Dict[int, Counter] = {}
+        self._doc_length: Dict[int, int] = {}
+        self._doc_meta: Dict[int, Dict] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._doc_tokens
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._doc_tokens.clear()
+            self._doc_length.clear()
+            self._doc_meta.clear()
+            self._total_length = 0
+
+    def upsert(self, doc_id: int, text: str, **meta) -> None:
+        """新增或更新一个模板；meta 保存名称、所有者等用于过滤与返回的字段。"""
+        counts = Counter(tokenize(text))
+        with self._lock:
+            self._remove_locked(doc_id)
+            for token, tf in counts.items():
+                self._postings.setdefault(token, {})[doc_id] = tf
+            self._doc_tokens[doc_id] = counts
+            self._doc_length[doc_id] = sum(counts.values())
+            self._doc_meta[doc_id] = meta
+            self._total_length += self._doc_length[doc_id]
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: int) -> None:
+        counts = self._doc_tokens.pop(doc_id, None)
+        if counts is None:
+            return
+        self._doc_meta.pop(doc_id, None)
+        self._total_length -= self._doc_length.pop(doc_id)
+        for token in counts:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[token]
+
+    def search(self, query: str, k: int = 5,
+               accept: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+        """返回 BM25 得分最高的 k 个模板（meta + id + score），accept 用于可见性过滤。"""
+        query_tokens = set(tokenize(query))
+        if not query_tokens:
+            return []
+
+        with self._lock:
+            doc_count = len(self._doc_tokens)
+            if not doc_count:
+                return []
+            avg_length = self._total_length / doc_count
+            scores: Dict[int, float] = {}
+            for token in query_tokens:
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, tf in postings.items():
+                    length = self._doc_length[doc_id]
+                    norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length))
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * norm
+
+            candidates: Iterable = scores.items()
+            if accept is not None:
+                candidates = ((doc_id, score) for doc_id, score in candidates if accept(self._doc_meta[doc_id]))
+            top = heapq.nlargest(k, candidates, key=lambda item: item[1])
+            return [
+                dict(self._doc_meta[doc_id], id=doc_id, score=round(score, 4))
+                for doc_id, score in top
+            ]
+
+
+class TemplateIndexManager:
+    """持有当前索引：首次使用时全量构建，之后按模板增量更新。
+
+    多 worker 部署时其它进程的写入无法直接通知到本进程，因此每隔
+    refresh_seconds 用一次轻量的签名查询（数量、最大 id、最大更新时间）
+    检查模板表是否变化。签名只在构建时记录：本进程写入后立即增量更新索引，
+    但不刷新签名，否则同一时间段内其它进程的写入会被一并记入签名而永远不会
+    触发重建，代价是本进程写入后的下一次检查也会重建一次。只有首次构建在请求
+    线程中进行；签名变化时在后台线程中新建索引，期间继续使用旧索引，建好后
+    回放期间的增量更新再整体替换。
+
+    后台线程需要的执行环境（如 Flask 应用上下文）由 background_context 提供，
+    它在发起重建的线程中调用，返回的上下文管理器在后台线程中进入。
+    """
+
+    def __init__(self, load_documents: Callable[[], Iterable[Tuple[int, str, Dict]]],
+                 load_signature: Callable[[], Hashable], refresh_seconds: float = 30,
+                 background_context: Optional[Callable[[], ContextManager]] = None):
+        self.load_documents = load_documents
+        self.load_signature = load_signature
+        self.refresh_seconds = refresh_seconds
+        self.background_context = background_context
+        self._index: Optional[TemplateIndex] = None
+        self._signature: Hashable = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        # 后台重建期间的增量更新，替换前回放到新索引；None 表示没有进行中的重建
+        self._pending: Optional[List[Tuple]] = None
+        self.rebuilds = 0
+
+    def current(self) -> TemplateIndex:
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < self.refresh_seconds:
+            return self._index
+        with self._lock:
+            if self._index is None:
+                self._signature = self.load_signature()
+                self._index = self._build()
+                self._checked_at = now
+            elif now - self._checked_at >= self.refresh_seconds:
+                self._checked_at = now
+                signature = self.load_signature()
+                if signature != self._signature and self._pending is None:
+                    self._start_rebuild(signature)
+            return self._index
+
+    def _build(self) -> TemplateIndex:
+        index = TemplateIndex()
+        for doc_id, text, meta in self.load_documents():
+            index.upsert(doc_id, text, **meta)
+        self.rebuilds += 1
+        return index
+
+    def _start_rebuild(self, signature: Hashable) -> None:
+        # 调用方持有 _lock
+        context = self.background_context() if self.background_context is not None else nullcontext()
+        self._pending = []
+        threading.Thread(target=self._rebuild, args=(context, signature), name='template-index-rebuild',
+                         daemon=True).start()
+
+    def _rebuild(self, context: ContextManager, signature: Hashable) -> None:
+        try:
+            with context:
+                index = self._build()
+        except Exception:
+            # 重建失败时保留旧索引，下次检查再试
+            with self._lock:
+                self._pending = None
+                self._checked_at = 0.0
+            return
+        with self._lock:
+            for op, args, meta in self._pending:
+                getattr(index, op)(*args, **meta)
+            # 签名在加载文档之前读取，新索引至少包含签名对应的全部写入
+            self._signature = signature
+            self._pending = None
+            self._index = index
+
+    def _apply(self, op: str, args: Tuple, meta: Dict) -> None:
+        with self._lock:
+            if self._index is None:
+                return
+            getattr(self._index, op)(*args, **meta)
+            if self._pending is not None:
+                self._pending.append((op, args, meta))
+
+    def upsert(self, doc_id: int, text: str, **meta) -> None:
+        self._apply('upsert', (doc_id, text), meta)
+
+    def remove(self, doc_id: int) -> None:
+        self._apply('remove', (doc_id,), {})
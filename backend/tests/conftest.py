@@ -0,0 +1,82 @@
+"""测试公共夹具：每个测试使用独立的临时 SQLite 文件库。
+
+在 backend 目录下运行：
+
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'benchmarks'))
+
+import pytest  # noqa: E402
+
+import ai_service  # noqa: E402
+import app as app_module  # noqa: E402
+from fake_llm_server import start_fake_llm_server  # noqa: E402
+from llm_guard import CircuitBreaker  # noqa: E402
+from template_index import TemplateIndexManager  # noqa: E402
+
+
+@pytest.fixture
+def app_config():
+    """额外的应用配置，测试模块可覆盖该夹具。"""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch, app_config):
+    # 进程级缓存按 id 缓存模板，每个测试的库都从 id 1 开始，需要清空
+    app_module.template_serialization_cache.clear()
+    app_module.patient_total_cache.clear()
+    app_module.user_identity_cache.clear()
+    monkeypatch.setattr(app_module, 'template_indexes', TemplateIndexManager(
+        app_module._load_template_documents, app_module._load_template_signature,
+        refresh_seconds=app_module.TEMPLATE_INDEX_REFRESH_SECONDS,
+        background_context=app_module.template_indexes.background_context,
+    ))
+
+    application = app_module.create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}", **app_config})
+    with application.app_context():
+        app_module.db.create_all()
+    yield application
+    committer = application.extensions.get('group_commit')
+    if committer is not None:
+        committer.shutdown()
+    with application.app_context():
+        app_module.db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    client.post('/api/register', json={'username': 'tester', 'password': 'secret'})
+    token = client.post('/api/login', json={'username': 'tester', 'password': 'secret'}).get_json()['access_token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """本地假大模型（benchmarks/fake_llm_server.py），返回其请求处理类。
+
+    可调整处理类的 latency / keyword_latency，request_count 为已收到的调用数。
+    """
+    server, base_url = start_fake_llm_server()
+    monkeypatch.setattr(ai_service, 'LLM_BASE_URL', base_url)
+    monkeypatch.setattr(ai_service, 'LLM_API_KEY', 'sk-fake')
+    monkeypatch.setattr(ai_service, 'llm_breaker', CircuitBreaker(
+        ai_service.LLM_BREAKER_FAILURES, ai_service.LLM_BREAKER_SLOW_SECONDS, ai_service.LLM_BREAKER_RESET_SECONDS,
+        is_failure=ai_service._is_upstream_failure,
+    ))
+    ai_service._client_manager.reset_after_fork()
+    yield server.RequestHandlerClass
+    ai_service._client_manager.reset_after_fork()
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,54 @@
+import json
+
+
+def _post_batch(client, auth_headers, items):
+    response = client.post('/api/ai/generate_record_suggestion/batch', json={'items': items, 'no_cache': True},
+                           headers=auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_one_line_per_index(client, auth_headers, fake_llm):
+    items = [{'symptom': f'发热第 {i} 天', 'age': 30 + i} for i in range(5)]
+    lines = _post_batch(client, auth_headers, items)
+
+    assert sorted(line['index'] for line in lines) == list(range(5))
+    assert all(line['diagnosis'] and line['treatment_plan'] for line in lines)
+    assert fake_llm.request_count == 5
+
+
+def test_duplicate_inputs_call_the_model_once(client, auth_headers, fake_llm):
+    item = {'symptom': '发热、咳嗽三天', 'age': 30, 'gender': '男'}
+    lines = _post_batch(client, auth_headers, [item, {'symptom': '腹痛'}, dict(item)])
+
+    assert sorted(line['index'] for line in lines) == [0, 1, 2]
+    assert fake_llm.request_count == 2
+    by_index = {line['index']: line for line in lines}
+    assert by_index[0]['diagnosis'] == by_index[2]['diagnosis']
+
+
+def test_blank_symptoms_get_error_lines(client, auth_headers, fake_llm):
+    lines = _post_batch(client, auth_headers, [{'symptom': ''}, {'symptom': '发热'}, {'symptom': '   '}, '发热'])
+
+    by_index = {line['index']: line for line in lines}
+    assert sorted(by_index) == [0, 1, 2, 3]
+    for index in (0, 2, 3):
+        assert by_index[index] == {'index': index, 'error': '症状不能为空'}
+    assert 'diagnosis' in by_index[1]
+    assert fake_llm.request_count == 1
+
+
+def test_results_stream_in_completion_order(client, auth_headers, fake_llm):
+    fake_llm.keyword_latency = {'慢': 0.5}
+    response = client.post('/api/ai/generate_record_suggestion/batch', json={
+        'items': [{'symptom': '慢性咳嗽'}, {'symptom': '发热'}, {'symptom': '腹痛'}], 'no_cache': True,
+    }, headers=auth_headers, buffered=False)
+
+    indexes = []
+    for chunk in response.response:
+        indexes.extend(json.loads(line)['index'] for line in chunk.decode('utf-8').splitlines())
+    response.close()
+    # 慢的一项最后返回，不阻塞其它结果
+    assert indexes[-1] == 0
+    assert sorted(indexes[:2]) == [1, 2]
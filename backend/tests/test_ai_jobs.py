@@ -0,0 +1,125 @@
+import threading
+import time
+
+import app as app_module
+from ai_jobs import FAILED, PENDING, RUNNING, STALE_JOB_ERROR, SUCCEEDED, AiJob, AiJobManager, DatabaseJobStore
+
+
+def _store(timeout_seconds=600):
+    return DatabaseJobStore(app_module.AiJobRecord.__table__, lambda: app_module.db.engine,
+                            poll_interval=0.02, timeout_seconds=timeout_seconds)
+
+
+def _manager(app):
+    # 每个 AiJobManager 相当于一个 gunicorn worker 进程，共享同一张 ai_jobs 表
+    return AiJobManager(max_workers=2, store=_store(), background_context=lambda: app.app_context())
+
+
+def _orphan(store, status, age):
+    """写入一个执行进程已退出的任务：状态停在 status，age 秒前提交 / 开始执行。"""
+    job = AiJob('tester')
+    job.status = status
+    job.created_at = time.time() - age
+    if status == RUNNING:
+        job.started_at = job.created_at
+    store.add(job)
+    return job
+
+
+def test_job_is_visible_from_another_worker(app):
+    worker_a, worker_b = _manager(app), _manager(app)
+    release = threading.Event()
+
+    def slow_job():
+        release.wait(5)
+        return {'diagnosis': '上呼吸道感染'}
+
+    with app.app_context():
+        job = worker_a.submit(slow_job, owner='tester')
+        remote = worker_b.get(job.id)
+        assert remote is not None and remote.owner == 'tester' and not remote.done
+
+        threading.Timer(0.1, release.set).start()
+        remote = worker_b.wait(remote, 5)
+        assert remote.status == SUCCEEDED
+        assert remote.result == {'diagnosis': '上呼吸道感染'}
+        assert worker_b.get('missing') is None
+    worker_a.shutdown()
+    worker_b.shutdown()
+
+
+def test_poll_served_by_a_worker_that_did_not_run_the_job(app, client, auth_headers, monkeypatch):
+    monkeypatch.setattr(app_module, '_run_record_suggestion', lambda **kwargs: {'diagnosis': kwargs['symptom']})
+    response = client.post('/api/ai/generate_record_suggestion?async=1', json={'symptom': '发热'},
+                           headers=auth_headers)
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    app_module.ai_jobs.get(job_id).wait(5)
+
+    # 去掉本进程内存中的任务，模拟轮询落在其它进程上
+    monkeypatch.setattr(app_module.ai_jobs, '_jobs', {})
+    body = client.get(f'/api/ai/jobs/{job_id}?wait=1', headers=auth_headers).get_json()
+    assert body == {'job_id': job_id, 'status': 'succeeded', 'result': {'diagnosis': '发热'}, 'error': None}
+
+    client.post('/api/register', json={'username': 'other', 'password': 'secret'})
+    token = client.post('/api/login', json={'username': 'other', 'password': 'secret'}).get_json()['access_token']
+    response = client.get(f'/api/ai/jobs/{job_id}', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 404
+
+
+def test_async_suggestion_against_fake_llm(client, auth_headers, fake_llm):
+    fake_llm.latency = 0.3
+    payload = {'symptom': '发热、咳嗽三天', 'age': 30, 'gender': '男', 'no_cache': True}
+    begin = time.perf_counter()
+    response = client.post('/api/ai/generate_record_suggestion?async=1', json=payload, headers=auth_headers)
+    # 提交不等待大模型返回
+    assert time.perf_counter() - begin < fake_llm.latency
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    assert client.get(f'/api/ai/jobs/{job_id}', headers=auth_headers).get_json()['status'] in (PENDING, RUNNING)
+
+    body = client.get(f'/api/ai/jobs/{job_id}?wait=5', headers=auth_headers).get_json()
+    assert body['status'] == SUCCEEDED
+    assert body['result']['diagnosis'] and body['result']['treatment_plan']
+    assert fake_llm.request_count == 1
+
+
+def test_submit_rejected_when_queue_is_full(client, auth_headers, fake_llm, monkeypatch):
+    fake_llm.latency = 0.3
+    monkeypatch.setattr(app_module, 'ai_jobs', AiJobManager(max_workers=1, max_pending=1))
+    statuses = [
+        client.post('/api/ai/generate_record_suggestion?async=1', json={'symptom': f'发热 {i}', 'no_cache': True},
+                    headers=auth_headers).status_code
+        for i in range(3)
+    ]
+    assert statuses == [202, 202, 503]
+    app_module.ai_jobs.shutdown()
+
+
+def test_job_orphaned_by_a_killed_worker_fails_after_timeout(app):
+    store = _store(timeout_seconds=60)
+    manager = AiJobManager(store=store)
+    with app.app_context():
+        running = _orphan(store, RUNNING, age=120)
+        pending = _orphan(store, PENDING, age=120)
+        recent = _orphan(store, RUNNING, age=5)
+
+        job = manager.get(running.id)
+        assert (job.status, job.error) == (FAILED, STALE_JOB_ERROR)
+        # 长轮询不再等满超时
+        begin = time.perf_counter()
+        assert manager.wait(manager.get(pending.id), 5).status == FAILED
+        assert time.perf_counter() - begin < 1
+        assert manager.get(recent.id).status == RUNNING
+
+
+def test_purge_expires_and_removes_orphaned_jobs(app):
+    store = _store(timeout_seconds=60)
+    with app.app_context():
+        orphan = _orphan(store, RUNNING, age=120)
+        store.purge(time.time() - 600)
+        assert store.load(orphan.id).status == FAILED
+
+        # 标记失败后与其它已结束的任务一样按保留时间删除
+        store.purge(time.time() + 1)
+        assert store.load(orphan.id) is None
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from app import MedicalRecord, Patient, db
+
+RECORD = {'symptom': '发热', 'diagnosis': '上呼吸道感染', 'treatment_plan': '休息'}
+
+
+@pytest.fixture
+def app_config():
+    return {'GROUP_COMMIT_ENABLED': True, 'GROUP_COMMIT_WINDOW_MS': 1, 'GROUP_COMMIT_TIMEOUT_SECONDS': 0.2}
+
+
+@pytest.fixture
+def patient_id(app):
+    with app.app_context():
+        patient = Patient(name='张三', id_card='110101199001011234', age=30, gender='男', department='内科')
+        db.session.add(patient)
+        db.session.commit()
+        return patient.id
+
+
+def _record_count(app):
+    with app.app_context():
+        return db.session.query(MedicalRecord).count()
+
+
+def test_insert_goes_through_the_committer(app, client, auth_headers, patient_id):
+    response = client.post(f'/api/patients/{patient_id}/records', json=RECORD, headers=auth_headers)
+    assert response.status_code == 201
+    assert response.get_json()['diagnosis'] == '上呼吸道感染'
+    assert app.extensions['group_commit'].items == 1
+
+
+def test_queued_insert_is_cancelled_on_timeout(app, client, auth_headers, patient_id):
+    committer = app.extensions['group_commit']
+    started, release = threading.Event(), threading.Event()
+
+    def block(session):
+        started.set()
+        return release.wait(5)
+
+    # 占住提交线程，让下一个请求的插入一直排队
+    blocker = committer.submit(block, lambda obj: obj)
+    assert started.wait(5)
+
+    response = client.post(f'/api/patients/{patient_id}/records', json=RECORD, headers=auth_headers)
+    assert response.status_code == 503
+    release.set()
+    blocker.result(5)
+    committer.shutdown()
+    assert _record_count(app) == 0
+
+
+def test_running_insert_times_out_with_unknown_outcome(app, client, auth_headers, patient_id, monkeypatch):
+    release = threading.Event()
+    to_dict = MedicalRecord.to_dict
+    # 插入已提交，生成响应时变慢：请求超时但数据已写入
+    monkeypatch.setattr(MedicalRecord, 'to_dict', lambda self: release.wait(5) and to_dict(self))
+
+    response = client.post(f'/api/patients/{patient_id}/records', json=RECORD, headers=auth_headers)
+    assert response.status_code == 500
+    assert '结果未知' in response.get_json()['message']
+    release.set()
+    app.extensions['group_commit'].shutdown()
+    assert _record_count(app) == 1
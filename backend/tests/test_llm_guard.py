@@ -0,0 +1,72 @@
+import openai
+import pytest
+
+from ai_service import _import_httpx, _is_upstream_failure
+from config import LLM_BREAKER_SLOW_SECONDS, LLM_READ_TIMEOUT
+from llm_guard import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+httpx = _import_httpx()
+REQUEST = httpx.Request('POST', 'http://llm.test/v1/chat/completions')
+
+
+def _status_error(cls, status):
+    return cls(f'status {status}', response=httpx.Response(status, request=REQUEST), body=None)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fail(breaker, exc):
+    with pytest.raises(type(exc)):
+        with breaker.guard():
+            raise exc
+
+
+@pytest.mark.parametrize('exc', [
+    openai.APITimeoutError(request=REQUEST),
+    openai.APIConnectionError(request=REQUEST),
+    _status_error(openai.RateLimitError, 429),
+    _status_error(openai.InternalServerError, 503),
+    httpx.ReadTimeout('read timeout', request=REQUEST),
+])
+def test_upstream_failures_open_the_breaker(exc):
+    breaker = CircuitBreaker(failure_threshold=3, is_failure=_is_upstream_failure)
+    for _ in range(3):
+        _fail(breaker, exc)
+    assert breaker.state == OPEN
+
+
+@pytest.mark.parametrize('exc', [
+    _status_error(openai.BadRequestError, 400),
+    _status_error(openai.AuthenticationError, 401),
+    _status_error(openai.NotFoundError, 404),
+])
+def test_request_errors_do_not_count(exc):
+    breaker = CircuitBreaker(failure_threshold=3, is_failure=_is_upstream_failure)
+    for _ in range(5):
+        _fail(breaker, exc)
+    assert breaker.stats()['consecutive_failures'] == 0
+    assert breaker.state == CLOSED
+
+
+def test_request_error_releases_half_open_probe():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=clock, is_failure=_is_upstream_failure)
+    _fail(breaker, openai.APITimeoutError(request=REQUEST))
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+
+    _fail(breaker, _status_error(openai.BadRequestError, 400))
+    # 试探名额已释放，下一个请求仍可试探
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_slow_threshold_is_below_read_timeout():
+    # 读超时的调用本身就计为失败，慢调用阈值需明显更短才有意义
+    assert LLM_BREAKER_SLOW_SECONDS <= LLM_READ_TIMEOUT / 2
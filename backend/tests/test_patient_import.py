@@ -0,0 +1,37 @@
+from sqlalchemy.exc import OperationalError
+
+import app as app_module
+from app import Patient, db
+
+CSV = 'name,id_card,age,gender,department\n张三,110101199001011234,30,男,内科\n李四,110101199001015678,40,女,外科\n'
+
+
+def _import(client, auth_headers, body):
+    return client.post('/api/patients/import?format=csv', data=body, headers=auth_headers)
+
+
+def test_import_utf8_csv(app, client, auth_headers):
+    response = _import(client, auth_headers, CSV.encode('utf-8'))
+    assert response.status_code == 200
+    assert response.get_json()['inserted'] == 2
+
+
+def test_undecodable_input_returns_400(app, client, auth_headers):
+    # Excel 导出的中文 CSV 默认为 GBK
+    response = _import(client, auth_headers, CSV.encode('gbk'))
+    assert response.status_code == 400
+    body = response.get_json()
+    assert 'UTF-8' in body['message']
+    assert body['inserted'] == 0
+    with app.app_context():
+        assert db.session.query(Patient).count() == 0
+
+
+def test_database_error_returns_500(app, client, auth_headers, monkeypatch):
+    def broken(*args, **kwargs):
+        raise OperationalError('INSERT INTO patients', {}, Exception('server has gone away'))
+
+    monkeypatch.setattr(app_module, 'import_patients', broken)
+    response = _import(client, auth_headers, CSV.encode('utf-8'))
+    assert response.status_code == 500
+    assert response.get_json() == {'message': '导入失败'}
@@ -0,0 +1,70 @@
+"""嵌套病历路由的 SQL 语句数：每个接口执行的语句数不超过预期，防止查询次数回退。
+
+统计每个请求执行的 SQL 语句数（含 INSERT / UPDATE，不含 BEGIN / COMMIT），同时
+检查状态码。写入接口的语句数包含写入事件维护统计表 / 汇总表的 upsert（新增病历
+8 条，修改诊断 6 条）以及提交后重新加载病历的 1 条 SELECT。
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import MedicalRecord, Patient, Template, db
+
+RECORD = {'symptom': '发热', 'diagnosis': '上呼吸道感染', 'treatment_plan': '休息'}
+
+# (名称, 方法, 路径, 请求体, 预期状态码, 最多语句数)
+CASES = [
+    ('get record', 'get', '/api/patients/1/records/1', None, 200, 1),
+    ('get record: other patient', 'get', '/api/patients/2/records/1', None, 400, 1),
+    ('update record', 'put', '/api/patients/1/records/1', {'diagnosis': '流感'}, 200, 9),
+    ('update record: no patient', 'put', '/api/patients/999/records/1', {'diagnosis': '流感'}, 404, 1),
+    ('update record: no record', 'put', '/api/patients/1/records/999', {'diagnosis': '流感'}, 404, 1),
+    ('update record: other patient', 'put', '/api/patients/2/records/1', {'diagnosis': '流感'}, 400, 1),
+    ('save as template', 'post', '/api/patients/1/records/1/save_as_template', {'name': 'T'}, 201, 3),
+    ('save as template: no record', 'post', '/api/patients/1/records/999/save_as_template', {}, 404, 1),
+    ('save as template: other patient', 'post', '/api/patients/2/records/1/save_as_template', {}, 400, 1),
+    ('record from template', 'post', '/api/patients/1/records/from_template/1', {}, 201, 12),
+    ('record from template: no patient', 'post', '/api/patients/999/records/from_template/1', {}, 404, 1),
+    ('record from template: no template', 'post', '/api/patients/1/records/from_template/999', {}, 404, 1),
+    ('add record', 'post', '/api/patients/1/records', RECORD, 201, 12),
+]
+
+
+class StatementCounter:
+    """在 with 块内统计全部引擎执行的语句数。"""
+
+    def __init__(self):
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(Engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(Engine, 'before_cursor_execute', self._on_execute)
+
+
+@pytest.fixture
+def seeded(app, auth_headers):
+    with app.app_context():
+        db.session.add_all([
+            Patient(name='张三', id_card='110101199001011234', age=30, gender='男', department='内科'),
+            Patient(name='李四', id_card='110101199001015678', age=40, gender='女', department='外科'),
+        ])
+        db.session.flush()
+        db.session.add(MedicalRecord(patient_id=1, **RECORD))
+        db.session.add(Template(name='模板', content='{"symptom": "咳嗽", "diagnosis": "支气管炎", '
+                                                     '"treatment_plan": "止咳"}', owner_id=1))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('name, method, url, body, status, limit', CASES, ids=[case[0] for case in CASES])
+def test_statement_count(client, auth_headers, seeded, name, method, url, body, status, limit):
+    with StatementCounter() as counter:
+        response = getattr(client, method)(url, json=body, headers=auth_headers)
+    assert response.status_code == status
+    assert counter.count <= limit, f'{name}: {counter.count} statements (limit {limit})'
@@ -0,0 +1,49 @@
+from datetime import date
+
+import department_stats
+import record_rollups
+from department_stats import CounterDeltas
+from record_rollups import RollupDeltas
+
+
+def _record_increments(monkeypatch):
+    calls = []
+
+    def fake_increment(connection, table, key, deltas):
+        calls.append((table, tuple(key.values())))
+
+    monkeypatch.setattr(department_stats, 'increment', fake_increment)
+    monkeypatch.setattr(record_rollups, 'increment', fake_increment)
+    return calls
+
+
+def _transfer(old, new):
+    deltas = CounterDeltas()
+    deltas.department(old, patient_count=-1, record_count=-2)
+    deltas.department(new, patient_count=1, record_count=2)
+    deltas.day(date(2026, 3, 2), new_records=1)
+    deltas.day(date(2026, 3, 1), new_records=1)
+    rollups = RollupDeltas()
+    for day in (date(2026, 3, 2), date(2026, 2, 27)):
+        rollups.add(day, old, '感冒', sign=-1)
+        rollups.add(day, new, '感冒')
+    return deltas, rollups
+
+
+def test_opposite_transfers_lock_rows_in_the_same_order(monkeypatch):
+    calls = _record_increments(monkeypatch)
+    orders = []
+    for old, new in (('内科', '外科'), ('外科', '内科')):
+        calls.clear()
+        deltas, rollups = _transfer(old, new)
+        deltas.apply(None, 'department_stats', 'daily_stats')
+        rollups.apply(None, 'visit_rollups', 'diagnosis_rollups')
+        orders.append(list(calls))
+
+    assert [key for _, key in orders[0]] == [key for _, key in orders[1]]
+    assert [table for table, _ in orders[0][:4]] == ['department_stats'] * 2 + ['daily_stats'] * 2
+    for table in ('department_stats', 'daily_stats', 'visit_rollups', 'diagnosis_rollups'):
+        keys = [key for name, key in orders[0] if name == table]
+        if table.endswith('rollups'):
+            keys = [(key[2], key[0], key[1]) + key[3:] for key in keys]
+        assert keys == sorted(keys)
@@ -0,0 +1,33 @@
+import app as app_module
+
+
+def test_to_dict_does_not_share_cached_content(app, client, auth_headers):
+    created = client.post('/api/templates', headers=auth_headers, json={
+        'name': '感冒', 'content': {'symptom': '发热', 'diagnosis': '上呼吸道感染', 'treatment_plan': '休息'},
+    }).get_json()
+
+    with app.app_context():
+        tpl = app_module.db.session.get(app_module.Template, created['id'])
+        data = tpl.to_dict()
+        data['content']['diagnosis'] = '被修改'
+        assert tpl.to_dict()['content']['diagnosis'] == '上呼吸道感染'
+
+    assert client.get(f"/api/templates/{created['id']}", headers=auth_headers).get_json() == created
+    listed = client.get('/api/templates', headers=auth_headers).get_json()
+    assert listed == [created]
+
+
+def test_edit_by_another_worker_within_the_same_second(app, client, auth_headers):
+    created = client.post('/api/templates', headers=auth_headers, json={'name': '感冒', 'content': {}}).get_json()
+    assert client.get('/api/templates', headers=auth_headers).get_json()[0]['name'] == '感冒'
+
+    # 其它进程的修改：不经过本进程的缓存失效，updated_at 与缓存的版本同一秒
+    table = app_module.Template.__table__
+    with app.app_context():
+        updated_at = app_module.db.session.get(app_module.Template, created['id']).updated_at
+        app_module.db.session.execute(
+            table.update().where(table.c.id == created['id']).values(name='流感', updated_at=updated_at))
+        app_module.db.session.commit()
+
+    assert client.get('/api/templates', headers=auth_headers).get_json()[0]['name'] == '流感'
+    assert client.get(f"/api/templates/{created['id']}", headers=auth_headers).get_json()['name'] == '流感'
@@ -0,0 +1,106 @@
+import threading
+
+import app as app_module
+from template_index import TemplateIndexManager
+
+TEMPLATE = {'name': '感冒', 'content': {'symptom': '发热、咳嗽', 'diagnosis': '上呼吸道感染', 'treatment_plan': '休息'}}
+
+
+def _search(text):
+    return [hit['id'] for hit in app_module.template_indexes.current().search(text, k=5)]
+
+
+def _expire(manager):
+    manager._checked_at = 0.0
+
+
+def _wait_for_rebuild(manager, old_index):
+    for _ in range(200):
+        if manager._pending is None and manager._index is not old_index:
+            return
+        threading.Event().wait(0.01)
+
+
+def test_local_write_is_searchable_without_rebuild(app, client, auth_headers):
+    with app.app_context():
+        assert _search('发热') == []
+    manager = app_module.template_indexes
+    assert manager.rebuilds == 1
+
+    response = client.post('/api/templates', json=TEMPLATE, headers=auth_headers)
+    assert response.status_code == 201
+    with app.app_context():
+        assert _search('发热') == [response.get_json()['id']]
+    assert manager.rebuilds == 1
+
+
+def test_foreign_write_is_not_hidden_by_a_local_write(app, client, auth_headers):
+    with app.app_context():
+        _search('发热')
+        manager = app_module.template_indexes
+        # 其它进程先写入，本进程随后写入：签名不能把其它进程的写入一并吸收
+        app_module.db.session.add(app_module.Template(
+            name='胃炎', content='{"symptom": "腹痛", "diagnosis": "胃炎"}', owner_id=1))
+        app_module.db.session.commit()
+    client.post('/api/templates', json=TEMPLATE, headers=auth_headers)
+
+    with app.app_context():
+        old_index = manager.current()
+        _expire(manager)
+        manager.current()
+    _wait_for_rebuild(manager, old_index)
+    with app.app_context():
+        assert len(_search('腹痛')) == 1
+        assert len(_search('发热')) == 1
+    assert manager.rebuilds == 2
+
+
+def test_external_change_rebuilds_in_background(app, client, auth_headers):
+    client.post('/api/templates', json=TEMPLATE, headers=auth_headers)
+    with app.app_context():
+        _search('发热')
+        manager = app_module.template_indexes
+        old_index = manager.current()
+        # 其它进程的写入：绕过本进程的增量更新
+        app_module.db.session.add(app_module.Template(
+            name='胃炎', content='{"symptom": "腹痛", "diagnosis": "胃炎"}', owner_id=1))
+        app_module.db.session.commit()
+        _expire(manager)
+        # 检查到变化的请求不等待重建，继续使用旧索引
+        assert manager.current() is old_index
+
+    _wait_for_rebuild(manager, old_index)
+    with app.app_context():
+        assert len(_search('腹痛')) == 1
+    assert manager.rebuilds == 2
+
+
+def test_local_writes_during_rebuild_are_replayed():
+    documents = [(1, '发热 咳嗽', {'name': 'a'})]
+    loading = threading.Event()
+    release = threading.Event()
+    signature = ['v1']
+
+    def load_documents():
+        if loading.is_set():
+            release.wait(5)
+        return list(documents)
+
+    manager = TemplateIndexManager(load_documents, lambda: signature[0], refresh_seconds=0)
+    manager.current()
+    loading.set()
+    signature[0] = 'v2'
+    manager.current()  # 发起后台重建，阻塞在 load_documents 中
+    assert manager._pending is not None
+
+    manager.upsert(2, '腹痛 腹泻', name='b')
+    manager.remove(1)
+    release.set()
+    for _ in range(200):
+        if manager._pending is None:
+            break
+        threading.Event().wait(0.01)
+
+    index = manager._index
+    assert [hit['id'] for hit in index.search('腹痛', k=5)] == [2]
+    assert index.search('咳嗽', k=5) == []
@@ -0,0 +1,41 @@
+"""生产环境入口。
+
+Linux（gunicorn，配置见 gunicorn.conf.py）：
+
+    cd backend
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Windows（gunicorn 不支持 Windows，使用 waitress 单进程多线程）：
+
+    cd backend
+    python wsgi.py
+
+启动前先执行 ``flask db upgrade``；生产入口不会创建或修改表结构。
+"""
+
+from app import ai_batches, ai_jobs, create_app, db
+from config import WEB_BIND, WEB_THREADS
+
+app = create_app()
+
+
+def shutdown():
+    """进程退出前等待已提交的 AI 异步任务、批量调用与组提交完成，并关闭数据库连接。"""
+    ai_jobs.shutdown(wait=True)
+    ai_batches.shutdown(wait=True)
+    committer = app.extensions.get('group_commit')
+    if committer is not None:
+        committer.shutdown(wait=True)
+    with app.app_context():
+        db.engine.dispose()
+
+
+if __name__ == '__main__':
+    from waitress import serve
+
+    host, _, port = WEB_BIND.rpartition(':')
+    try:
+        # waitress 收到 Ctrl+C / SIGTERM 后停止接收新连接并返回
+        serve(app, host=host or '0.0.0.0', port=int(port), threads=WEB_THREADS)
+    finally:
+        shutdown()